@@ -0,0 +1,71 @@
+import ctypes
+import mmap
+import os
+import time
+
+# what --advice applies to the mapped index before the first query; "none"
+# leaves the kernel's readahead as the library got it
+HINTS = [
+    "none",
+    "random",
+    "sequential",
+    "willneed",
+    "populate-read",
+    "fadvise-willneed",
+]
+MADVISE = {
+    "random": mmap.MADV_RANDOM,
+    "sequential": mmap.MADV_SEQUENTIAL,
+    "willneed": mmap.MADV_WILLNEED,
+    # Linux 5.14, Python only knows it if its headers did
+    "populate-read": getattr(mmap, "MADV_POPULATE_READ", 22),
+}
+
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+
+
+def mappings(path: str) -> list[tuple[int, int]]:
+    """[start, end) of every mapping of path in this process."""
+    path = os.path.realpath(path)
+    ranges = []
+    with open("/proc/self/maps") as f:
+        for line in f:
+            fields = line.split(maxsplit=5)
+            if len(fields) == 6 and fields[5].rstrip("\n") == path:
+                start, end = fields[0].split("-")
+                ranges.append((int(start, 16), int(end, 16)))
+    return ranges
+
+
+def apply(paths, hint: str):
+    """Advise the kernel about paths as hint, (bytes advised, seconds).
+
+    The madvise hints go to the library's own mappings of the files, found
+    in /proc/self/maps: a file the runner read into memory has none, and
+    gets nothing. fadvise-willneed starts readahead of the whole file into
+    the page cache, mapped or not.
+    """
+    if hint == "none":
+        return 0, 0.0
+
+    advised = 0
+    begin = time.perf_counter()
+    for path in paths:
+        if hint == "fadvise-willneed":
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                advised += os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            continue
+
+        for start, end in mappings(path):
+            if _libc.madvise(start, end - start, MADVISE[hint]) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(
+                    errno, f"madvise {hint} of {path}: {os.strerror(errno)}"
+                )
+            advised += end - start
+    return advised, time.perf_counter() - begin
@@ -0,0 +1,157 @@
+import hashlib
+import mmap
+import os
+import struct
+import h5py
+import numpy as np
+from .build import BUILD_CHUNK
+from .fetch import sha256sum
+from .mod_exact import ground_truth
+
+ARRAYS = ["train", "test", "neighbors"]
+# neighbors computed for a dataset that ships none, ann-benchmarks' depth
+GROUND_TRUTH_K = 100
+
+# the .npy header is padded to a page, so the data starts page aligned and
+# every row lands where a plain read of the file would put it
+HEADER_SIZE = mmap.PAGESIZE
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _header(shape, dtype: np.dtype) -> bytes:
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": tuple(shape),
+        }
+    )
+    # magic, then the header length as a little endian u16
+    size = HEADER_SIZE - len(NPY_MAGIC) - 2
+    return (
+        NPY_MAGIC
+        + struct.pack("<H", size)
+        + (header.ljust(size - 1) + "\n").encode("latin1")
+    )
+
+
+def write(path: str, shape, dtype: np.dtype, chunks):
+    """chunks, row blocks of an array of shape, as a .npy at path.
+
+    The sha256 of the file is taken on the way and kept next to it.
+    """
+    digest = hashlib.sha256()
+    part = f"{path}.part"
+    with open(part, "wb") as f:
+        header = _header(shape, dtype)
+        digest.update(header)
+        f.write(header)
+        for chunk in chunks:
+            block = np.ascontiguousarray(chunk, dtype=dtype).tobytes()
+            digest.update(block)
+            f.write(block)
+    _write_digest(path, digest.hexdigest())
+    os.replace(part, path)
+
+
+def _convert(dataset: h5py.Dataset | np.ndarray, path: str):
+    """dataset as a .npy at path, copied BUILD_CHUNK rows at a time."""
+    dtype = dataset.dtype
+    if dtype.kind == "f":
+        dtype = np.dtype(np.float32)  # every runner wants float32 anyway
+
+    chunks = (
+        dataset[start : start + BUILD_CHUNK]
+        for start in range(0, dataset.shape[0], BUILD_CHUNK)
+    )
+    write(path, dataset.shape, dtype, chunks)
+
+
+def _write_digest(path: str, digest: str):
+    with open(f"{path}.sha256", "w") as f:
+        f.write(f"{digest}  {os.path.basename(path)}\n")
+
+
+def digest(out_dir: str) -> str:
+    """sha256 of train.npy, the identity of a dataset for the index registry.
+
+    Taken during the conversion; a directory converted before that is
+    hashed once here and remembered.
+    """
+    path = os.path.join(out_dir, "train.npy")
+    try:
+        with open(f"{path}.sha256") as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        pass
+
+    value = sha256sum(path)
+    _write_digest(path, value)
+    return value
+
+
+def array_dir(data_dir: str, dataset_base: str) -> str:
+    return os.path.join(data_dir, dataset_base)
+
+
+def converted(out_dir: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(out_dir, f"{name}.npy")) for name in ARRAYS
+    )
+
+
+def convert(hdf5_path: str, out_dir: str, threads: int | None = None):
+    """One time: the HDF5 file's arrays as page aligned .npy in out_dir.
+
+    A file without neighbors gets exact ones, computed over threads.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"Converting {hdf5_path} to {out_dir}")
+    with h5py.File(hdf5_path, "r") as f:
+        for name in ARRAYS:
+            if name == "neighbors" and name not in f:
+                continue
+            dataset = f[name]
+            if not isinstance(dataset, h5py.Dataset):
+                raise TypeError(
+                    f"'{name}' is not a dataset but {type(dataset)}"
+                )
+            path = os.path.join(out_dir, f"{name}.npy")
+            if not os.path.exists(path):
+                _convert(dataset, path)
+
+    path = os.path.join(out_dir, "neighbors.npy")
+    if not os.path.exists(path):
+        write_ground_truth(out_dir, hdf5_path, threads or os.cpu_count())
+
+
+def write_ground_truth(out_dir: str, name: str, threads: int):
+    """neighbors.npy (and distances.npy) of out_dir's test in its train."""
+    train = np.load(os.path.join(out_dir, "train.npy"), mmap_mode="r")
+    test = np.load(os.path.join(out_dir, "test.npy"), mmap_mode="r")
+    metric = "angular" if "angular" in name else "euclidean"
+    k = min(GROUND_TRUTH_K, train.shape[0])
+
+    print(f"Computing exact {metric} neighbors@{k}, threads={threads}")
+    neighbors, distances = ground_truth(train, test, k, metric, threads)
+    _convert(distances, os.path.join(out_dir, "distances.npy"))
+    _convert(neighbors, os.path.join(out_dir, "neighbors.npy"))
+
+
+def load(out_dir: str) -> dict[str, np.ndarray]:
+    """name -> read only memmap, nothing is read until it is touched.
+
+    The pages are the file's page cache pages: every process that loads the
+    same dataset shares them, and they can be registered for replication
+    like the index files.
+    """
+    return {
+        name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode="r")
+        for name in ARRAYS
+    }
+
+
+def touch(*mapped: np.ndarray):
+    """Read one byte per page, faulting the mapping in from the page cache."""
+    for array in mapped:
+        array.reshape(-1).view(np.uint8)[:: mmap.PAGESIZE].sum()
@@ -0,0 +1,60 @@
+import numpy as np
+
+# rows per chunk read from train: 125M of gist, 13M of glove
+BUILD_CHUNK = 32_768
+# faiss warns past 256 training points per list, and gains nothing from them
+FAISS_TRAIN_PER_LIST = 256
+
+
+def normalize_rows(chunk: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+    norms[norms == 0] = 1  # a zero vector stays zero, as sklearn leaves it
+    # not in place: a chunk of a mapped train is the read only file
+    return chunk / norms
+
+
+def iter_chunks(train: np.ndarray, normalize: bool = False):
+    """(start, float32 rows) over train, one BUILD_CHUNK at a time.
+
+    Only one chunk is ever resident, so a build's anonymous memory is bounded
+    by BUILD_CHUNK and not by the dataset.
+    """
+    nvecs = train.shape[0]
+    for start in range(0, nvecs, BUILD_CHUNK):
+        chunk = np.ascontiguousarray(
+            train[start : start + BUILD_CHUNK], dtype=np.float32
+        )
+        yield start, normalize_rows(chunk) if normalize else chunk
+
+
+def sample(train: np.ndarray, size: int, normalize: bool = False):
+    """About size rows spread evenly over train, read as one strided slab."""
+    stride = max(1, train.shape[0] // size)
+    rows = np.ascontiguousarray(train[::stride][:size], dtype=np.float32)
+    return normalize_rows(rows) if normalize else rows
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak_rss() -> bool:
+    """Restart VmHWM from the current RSS, so a peak belongs to one build."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb() -> float:
+    return _status_kb("VmRSS") / 1024
+
+
+def peak_rss_mb() -> float:
+    return _status_kb("VmHWM") / 1024
@@ -0,0 +1,102 @@
+import collections
+import time
+import numpy as np
+
+# popularity of the i-th most asked query is proportional to 1 / i^ZIPF_S
+ZIPF_S = 1.0
+# the stream is this many times test long, so every query can come back
+CACHE_PASSES = 10
+# queries that reach the cache together: the misses among them go to the
+# backend as one batch
+CACHE_BATCH = 256
+
+
+def zipf_stream(n: int, length: int, s: float, seed: int = 0) -> np.ndarray:
+    """length draws from range(n), Zipfian with exponent s.
+
+    Popularity ranks go to a random permutation of the ids, so the hot
+    queries are not test's first rows.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** s
+    cdf = np.cumsum(weights)
+    ranks = np.searchsorted(cdf, rng.random(length) * cdf[-1], side="right")
+    return rng.permutation(n)[np.minimum(ranks, n - 1)]
+
+
+class LRUCache:
+    """Query id -> neighbours, at most size entries, least recent evicted.
+
+    size 0 is no cache: replay_cached sends every query to the backend.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        found = self._entries.get(key)
+        if found is not None:
+            self._entries.move_to_end(key)
+        return found
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+def replay_cached(backend, test: np.ndarray, k: int, stream, cache):
+    """stream's queries through cache, the misses to backend.
+
+    backend(queries) -> (pred, seconds) answers a batch. The stream goes
+    CACHE_BATCH at a time; within one, a query already missed is not sent
+    again but waits for that answer, and counts as a hit. Returns the
+    stream's pred, the hits, the backend's queries and its time.
+    """
+    pred = np.full((len(stream), k), -1, dtype=np.int64)
+    hits = 0
+    backend_queries = 0
+    backend_time = 0.0
+
+    begin = time.perf_counter()
+    for start in range(0, len(stream), CACHE_BATCH):
+        ids = stream[start : start + CACHE_BATCH]
+        if cache.size == 0:
+            found, seconds = backend(test[ids])
+            pred[start : start + len(ids)] = found
+            backend_queries += len(ids)
+            backend_time += seconds
+            continue
+
+        # query id -> positions in the batch waiting for it
+        missed = {}
+        for i, j in enumerate(ids):
+            found = cache.get(j)
+            if found is not None:
+                pred[start + i] = found
+                hits += 1
+            elif j in missed:
+                missed[j].append(i)
+                hits += 1
+            else:
+                missed[j] = [i]
+        if not missed:
+            continue
+
+        found, seconds = backend(test[list(missed)])
+        backend_queries += len(missed)
+        backend_time += seconds
+        for row, (j, at) in zip(found, missed.items()):
+            pred[[start + i for i in at]] = row
+            cache.put(j, row)
+    elapsed = time.perf_counter() - begin
+
+    return {
+        "pred": pred,
+        "hits": hits,
+        "elapsed": elapsed,
+        "backend_queries": backend_queries,
+        "backend_time": backend_time,
+    }
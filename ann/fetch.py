@@ -0,0 +1,145 @@
+import hashlib
+import os
+import shutil
+import requests
+
+DATASET_URL = "http://ann-benchmarks.com"
+FETCH_CHUNK = 8 * 1024 * 1024
+
+# dataset -> sha256 a download must match before it is renamed into place.
+# A mirror entry, or the digest recorded next to an earlier download, stands
+# in for a missing pin; with none, the download is kept with a warning
+# giving the digest to pin here, or stops at its complete .part with
+# require_pin. Empty until the upstream files can be hashed
+CHECKSUMS: dict[str, str] = {}
+
+
+def sha256sum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(FETCH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _recorded_digest(directory: str, dataset: str) -> str | None:
+    """The sha256 a <dataset>.sha256 in directory recorded."""
+    try:
+        with open(os.path.join(directory, f"{dataset}.sha256")) as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def _mirror_blob(mirror_dir: str, digest: str) -> str:
+    return os.path.join(mirror_dir, "sha256", digest)
+
+
+def _publish(mirror_dir: str, dataset: str, path: str, digest: str):
+    """Copy a verified file into the mirror, under its content address."""
+    blob = _mirror_blob(mirror_dir, digest)
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    if not os.path.exists(blob):
+        shutil.copyfile(path, f"{blob}.part")
+        os.replace(f"{blob}.part", blob)
+
+    name = os.path.join(mirror_dir, f"{dataset}.sha256")
+    with open(f"{name}.part", "w") as f:
+        f.write(f"{digest}  {dataset}\n")
+    os.replace(f"{name}.part", name)
+
+
+def _download(url: str, part: str):
+    """Stream url into part, carrying on from whatever part already holds."""
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {"Range": f"bytes={have}-"} if have else {}
+
+    with requests.get(url, headers=headers, stream=True, timeout=60) as r:
+        if r.status_code == 416:  # the range starts at the end: complete
+            return
+        r.raise_for_status()
+        if r.status_code != 206:
+            have = 0  # the server ignored the range, start over
+        else:
+            print(f"Resuming at {have / 2**20:.0f}M")
+
+        total = r.headers.get("Content-Length")
+        with open(part, "ab" if have else "wb") as f:
+            for chunk in r.iter_content(FETCH_CHUNK):
+                f.write(chunk)
+
+    if total is not None and os.path.getsize(part) != have + int(total):
+        raise IOError(
+            f"{url}: got {os.path.getsize(part)} bytes,"
+            f" expected {have + int(total)}"
+        )
+
+
+def fetch_dataset(
+    dataset: str,
+    data_dir: str,
+    mirror_dir: str | None = None,
+    base_url: str = DATASET_URL,
+    require_pin: bool = False,
+) -> str:
+    """Path of a complete, verified copy of dataset, fetching it if needed.
+
+    The mirror is tried first: a blob named by the sha256 the mirror
+    recorded for the dataset, used in place. Otherwise the file is
+    streamed into data_dir as <dataset>.part, which only becomes <dataset>
+    once its checksum holds, so an interrupted run resumes from the part
+    instead of trusting it. A fresh download is published to the mirror.
+
+    A <dataset> already in data_dir is used once it hashes to its pin, or
+    to the digest recorded when it was downloaded; one that does not, or
+    that an older downloader left with no record, goes back to being the
+    part, and the download resumes from it.
+    """
+    if mirror_dir:
+        digest = _recorded_digest(mirror_dir, dataset)
+        blob = digest and _mirror_blob(mirror_dir, digest)
+        if blob and os.path.exists(blob):
+            print(f"Using {dataset} from mirror {blob}")
+            return blob
+
+    path = os.path.join(data_dir, dataset)
+    part = f"{path}.part"
+    expected = (
+        CHECKSUMS.get(dataset)
+        or (mirror_dir and _recorded_digest(mirror_dir, dataset))
+        or _recorded_digest(data_dir, dataset)
+    )
+    if os.path.exists(path):
+        if expected and sha256sum(path) == expected:
+            return path
+        print(f"{path} is unverified, resuming it as {part}")
+        os.replace(path, part)
+
+    url = f"{base_url.rstrip('/')}/{dataset}"
+    print(f"Downloading {dataset} from {url} ...")
+    _download(url, part)
+
+    digest = sha256sum(part)
+    if expected and digest != expected:
+        os.remove(part)
+        raise IOError(f"{dataset}: sha256 {digest}, expected {expected}")
+    if not expected:
+        if require_pin:
+            # complete, so a rerun once it is pinned only hashes it again
+            raise IOError(
+                f"{dataset}: no sha256 to check {part} against, got {digest}:"
+                " pin it in ann.fetch.CHECKSUMS"
+            )
+        print(
+            f"[WARN] {dataset}: no sha256 to check against, got {digest}:"
+            " pin it in ann.fetch.CHECKSUMS"
+        )
+    os.replace(part, path)
+
+    with open(f"{path}.sha256", "w") as f:
+        f.write(f"{digest}  {dataset}\n")
+    if mirror_dir:
+        _publish(mirror_dir, dataset, path, digest)
+
+    print(f"Downloaded {dataset} to {path}, sha256 {digest}")
+    return path
@@ -0,0 +1,65 @@
+import numpy as np
+
+# 2^5 linear sub-buckets per power of two: every recorded value lands in a
+# bucket at most 1/32 (~3%) wider than itself, whatever its magnitude
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+# 2^40 ns is ~18 min, far past anything a single query takes
+MAX_BITS = 40
+NB_BUCKETS = (MAX_BITS - SUB_BITS + 1) * SUB_COUNT
+
+
+class LatencyHistogram:
+    """Log bucketed latency histogram in nanoseconds, HDR style.
+
+    Below 2^SUB_BITS ns every value has its own bucket, above that each power
+    of two is cut into SUB_COUNT equal buckets. That keeps the relative error
+    constant in a fixed ~9 KB of counts, and two histograms merge by adding
+    their counts, so per thread or per run histograms combine exactly.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(NB_BUCKETS, dtype=np.int64)
+
+    @staticmethod
+    def _buckets(values: np.ndarray) -> np.ndarray:
+        values = np.clip(values, 0, (1 << MAX_BITS) - 1).astype(np.int64)
+        # frexp's exponent is the bit length, exact for anything under 2^53
+        _, bits = np.frexp(values.astype(np.float64))
+        shift = np.maximum(bits.astype(np.int64) - 1 - SUB_BITS, 0)
+        return shift * SUB_COUNT + (values >> shift)
+
+    @staticmethod
+    def _highest(buckets: np.ndarray) -> np.ndarray:
+        """The largest value each bucket holds."""
+        shift = np.maximum(buckets // SUB_COUNT - 1, 0)
+        lowest = (buckets - shift * SUB_COUNT) << shift
+        return lowest + (1 << shift) - 1
+
+    def record(self, values_ns: np.ndarray):
+        self.counts += np.bincount(
+            self._buckets(np.asarray(values_ns)), minlength=NB_BUCKETS
+        )
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts += other.counts
+        return self
+
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def mean(self) -> float:
+        buckets = np.nonzero(self.counts)[0]
+        weights = self.counts[buckets]
+        return float(
+            np.sum(self._highest(buckets) * weights) / max(weights.sum(), 1)
+        )
+
+    def percentile(self, q: float) -> int:
+        """Highest value equivalent to the q-th percentile, in ns."""
+        total = self.total()
+        if total == 0:
+            return 0
+        rank = max(int(np.ceil(q / 100 * total)), 1)
+        bucket = np.searchsorted(np.cumsum(self.counts), rank)
+        return int(self._highest(np.array([bucket]))[0])
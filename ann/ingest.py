@@ -0,0 +1,187 @@
+import contextlib
+import os
+import threading
+import time
+import numpy as np
+from .build import sample
+from .mod_exact import knn, row_terms
+
+# the writer adds what is due once per period, in one call
+WRITE_PERIOD = 1.0
+# and writes its index back to the live file this often, and once at the end
+SAVE_PERIOD = 10.0
+# an inserted vector is a train row moved by this much of train's spread,
+# per dimension: new data from the same distribution
+WRITE_NOISE = 0.1
+SPREAD_SAMPLE = 10_000
+# queries scored at once against their current ground truth
+TRUTH_BLOCK = 256
+# a reader that cannot search while the writer adds holds the lock for this
+# many queries at a time, so the adds land between its chunks
+READ_CHUNK = 64
+
+
+def live_path(index_path: str) -> str:
+    """Where the writer persists an index: its suffix is the index's, so
+    registering the index suffixes registers it too."""
+    root, ext = os.path.splitext(index_path)
+    return f"{root}-live{ext}"
+
+
+class Inserts:
+    """New vectors, drawn near random train rows."""
+
+    def __init__(self, train: np.ndarray, seed: int = 0):
+        self._train = train
+        self._rng = np.random.default_rng(seed)
+        self._spread = sample(train, SPREAD_SAMPLE).std(axis=0) * WRITE_NOISE
+
+    def next(self, n: int) -> np.ndarray:
+        # sorted, so the mapped train is read front to back
+        rows = np.sort(self._rng.integers(0, self._train.shape[0], n))
+        vectors = np.asarray(self._train[rows], dtype=np.float32)
+        noise = self._rng.standard_normal(vectors.shape, dtype=np.float32)
+        return vectors + noise * self._spread
+
+
+class TrueNeighbors:
+    """The exact neighbors of test in train plus everything inserted so far.
+
+    Starts from the dataset's neighbors, scored the way mod_exact scores,
+    and folds each inserted block in with one knn over the block alone:
+    nothing is ever searched twice.
+    """
+
+    def __init__(
+        self,
+        train: np.ndarray,
+        test: np.ndarray,
+        neighbors: np.ndarray,
+        metric: str,
+    ):
+        self._test = np.ascontiguousarray(test, dtype=np.float32)
+        self._metric = metric
+        self.k = neighbors.shape[1]
+        self.ids = np.array(neighbors, dtype=np.int64)
+        self._scores = np.empty(self.ids.shape, dtype=np.float32)
+
+        for start in range(0, self.ids.shape[0], TRUTH_BLOCK):
+            ids = self.ids[start : start + TRUTH_BLOCK]
+            rows = np.asarray(train[ids.ravel()], dtype=np.float32)
+            terms = row_terms(rows, metric).reshape(ids.shape)
+            dots = np.einsum(
+                "bd,bkd->bk",
+                self._test[start : start + TRUTH_BLOCK],
+                rows.reshape(*ids.shape, -1),
+            )
+            if metric == "euclidean":
+                self._scores[start : start + TRUTH_BLOCK] = terms - 2 * dots
+            else:
+                self._scores[start : start + TRUTH_BLOCK] = -dots * terms
+
+    def extend(self, start: int, vectors: np.ndarray):
+        """Fold in vectors, inserted as ids start on."""
+        terms = row_terms(vectors, self._metric)
+        ids, scores = knn(
+            vectors, terms, self._metric, self._test, min(self.k, len(vectors))
+        )
+        scores = np.concatenate([self._scores, scores], axis=1)
+        ids = np.concatenate([self.ids, ids + start], axis=1)
+        keep = np.argpartition(scores, self.k - 1, axis=1)[:, : self.k]
+        self._scores = np.take_along_axis(scores, keep, axis=1)
+        self.ids = np.take_along_axis(ids, keep, axis=1)
+
+
+class Writer:
+    """A thread inserting rate new vectors per second into runner.
+
+    The vectors get the ids after train's. Every SAVE_PERIOD, if anything
+    was added since, the index is written back over the live file at path:
+    the same file, rewritten, never renamed over. A runner that cannot
+    search while it adds (ADD_WHILE_SEARCHING false, both faiss and
+    usearch) is guarded by lock, which readers take too.
+    """
+
+    def __init__(self, runner, train: np.ndarray, rate: float, path: str):
+        self.runner = runner
+        self.rate = rate
+        self.path = path
+        self.lock = (
+            contextlib.nullcontext()
+            if runner.ADD_WHILE_SEARCHING
+            else threading.Lock()
+        )
+        self.first_id = train.shape[0]
+        self.count = 0
+        self._saved = 0
+        # (start id, vectors) per add, in order
+        self.inserted = []
+        self.add_times = []
+        self.save_times = []
+
+        self._inserts = Inserts(train)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+
+    def _save(self):
+        if self._saved == self.count:
+            return
+        self._saved = self.count
+        begin = time.perf_counter()
+        with self.lock:
+            self.runner.save(self.path)
+        self.save_times.append(time.perf_counter() - begin)
+
+    def _run(self):
+        begin = time.perf_counter()
+        last_save = begin
+        tick = 0
+        while True:
+            tick += 1
+            if self._stop.wait(
+                begin + tick * WRITE_PERIOD - time.perf_counter()
+            ):
+                break
+            due = int(self.rate * tick * WRITE_PERIOD) - self.count
+            if due > 0:
+                vectors = self._inserts.next(due)
+                start = self.first_id + self.count
+                add_begin = time.perf_counter()
+                with self.lock:
+                    self.runner.add(start, vectors)
+                self.add_times.append(time.perf_counter() - add_begin)
+                self.inserted.append((start, vectors))
+                self.count += due
+            if time.perf_counter() - last_save >= SAVE_PERIOD:
+                self._save()
+                last_save = time.perf_counter()
+        self._save()
+
+    def query_batch(self, test: np.ndarray, k: int):
+        """runner.query_batch(test, k), interleaved with the adds.
+
+        A runner that searches while it adds gets test in one batch. One
+        that cannot gets it READ_CHUNK queries at a time, each under lock,
+        and its time is the pass's wall time, waits on the adds included.
+        """
+        if self.runner.ADD_WHILE_SEARCHING:
+            return self.runner.query_batch(test, k)
+
+        preds = []
+        begin = time.perf_counter()
+        for start in range(0, test.shape[0], READ_CHUNK):
+            with self.lock:
+                pred, _ = self.runner.query_batch(
+                    test[start : start + READ_CHUNK], k
+                )
+            preds.append(pred)
+        return np.concatenate(preds), time.perf_counter() - begin
+
+    def start(self):
+        self.begin = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.begin
@@ -1,30 +1,56 @@
-import requests
 import os
-import h5py
 import numpy as np
 import csv
 import time
+import multiprocessing.pool
 from config import get_time, sh
+from .histogram import LatencyHistogram
+from .shard import NodeReplicas, NodeShards
+from .serve import ServeProcesses, node_file_pages_mb
+from .load import LOAD_SECS, open_loop
+from .server import QueryServer, replay
+from .tenants import Tenant
+from . import ingest
+from . import advise
+from .cache import CACHE_PASSES, ZIPF_S, LRUCache, replay_cached, zipf_stream
+from .build import peak_rss_mb, reset_peak_rss, rss_mb
+from .fetch import DATASET_URL, fetch_dataset
+from . import arrays
+from . import usage
+from . import synth
+from . import registry
 from . import mod_faiss
 from . import mod_annoy
 from . import mod_usearch
+from . import mod_exact
 
 NB_RUNS = 30
 MAX_TIME = 300
 
+# faiss-ivfpq codes 2 (glove) or 4 dims per byte; faiss-hnsw searches as
+# deep as usearch, the same graph
 CONFIG = {
     "glove-100-angular.hdf5": {
         "faiss": {"nlist": 100, "nprobe": 39},
+        "faiss-ivfpq": {"nlist": 100, "m": 50, "nbits": 8, "nprobe": 39},
+        "faiss-ivfsq8": {"nlist": 100, "nprobe": 39},
+        "faiss-hnsw": {"M": 32, "ef_construction": 200, "ef_search": 5000},
         "annoy": {"trees": 100, "search_k": 250_000},
         "usearch": {"e_search": 5000},
     },
     "sift-128-euclidean.hdf5": {
         "faiss": {"nlist": 100, "nprobe": 10},
+        "faiss-ivfpq": {"nlist": 100, "m": 32, "nbits": 8, "nprobe": 10},
+        "faiss-ivfsq8": {"nlist": 100, "nprobe": 10},
+        "faiss-hnsw": {"M": 32, "ef_construction": 200, "ef_search": 256},
         "annoy": {"trees": 100, "search_k": 40_000},
         "usearch": {"e_search": 256},
     },
     "gist-960-euclidean.hdf5": {
         "faiss": {"nlist": 100, "nprobe": 18},
+        "faiss-ivfpq": {"nlist": 100, "m": 240, "nbits": 8, "nprobe": 18},
+        "faiss-ivfsq8": {"nlist": 100, "nprobe": 18},
+        "faiss-hnsw": {"M": 32, "ef_construction": 200, "ef_search": 2500},
         "annoy": {"trees": 100, "search_k": 500_000},
         "usearch": {"e_search": 2500},
     },
@@ -32,86 +58,171 @@ CONFIG = {
 
 DATASETS = list(CONFIG.keys())
 
+# --sweep scales each runner's CONFIG search setting by these, the CONFIG
+# operating point (1) included
+SWEEP_FACTORS = [1 / 16, 1 / 8, 1 / 4, 1 / 2, 1, 2, 4]
+SWEEP_RUNS = 3
+
+# --scaling doubles the thread count from 1 up to --threads
+SCALING_RUNS = 3
+# runs of the test set per --batch-size x --concurrency combination
+BATCH_RUNS = 3
+# runs of the test set per --serve process count
+SERVE_RUNS = 5
+
+# --cold-start times query_batch calls of this many queries, so that a
+# second's count is never one huge batch landing late
+COLD_BATCH = 64
+# replays of the Zipfian stream per cache size, each from an empty cache
+CACHE_RUNS = 3
+
+# (percentile, column) reported by --latency, in microseconds
+LATENCY_PERCENTILES = [(50, "p50_us"), (99, "p99_us"), (99.9, "p999_us")]
+
 
 def sync_drop_caches():
     sh("sync; echo 3 > /proc/sys/vm/drop_caches")
 
 
-def download_data(dataset: str, path: str):
-    if os.path.exists(path):
-        return
+# index file suffix of each faiss family, IVFFlat's predates the others
+FAISS_SUFFIXES = {
+    "ivfflat": "ivf",
+    "ivfpq": "ivfpq",
+    "ivfsq8": "ivfsq8",
+    "hnsw": "hnsw",
+}
 
-    url = f"http://ann-benchmarks.com/{dataset}"
-    print(f"Downloading {dataset} from {url} ...")
 
-    response = requests.get(url)
-    response.raise_for_status()
-    with open(path, "wb") as f:
-        f.write(response.content)
+def faiss_creator(family: str):
+    def create_faiss(index_dir: str, dataset: str, dataset_config):
+        suffix = FAISS_SUFFIXES[family]
+        index_path = os.path.join(index_dir, f"{dataset}.{suffix}")
+        name = mod_faiss.config_key(family)
+        config = dataset_config.get(name, {})
+        runner = mod_faiss.Faiss(family)
+        return runner, index_path, config, name
 
-    print(f"Downloaded {dataset} to {path}")
+    return create_faiss
 
 
-def create_faiss(index_dir: str, dataset: str, dataset_config):
-    index_path = os.path.join(index_dir, f"{dataset}.ivf")
-    config = dataset_config.get("faiss", {})
-    runner = mod_faiss.Faiss()
-    return runner, index_path, config, "faiss"
+create_faiss = faiss_creator("ivfflat")
 
 
 def create_annoy(index_dir: str, dataset: str, dataset_config):
     index_path = os.path.join(index_dir, f"{dataset}.ann")
     config = dataset_config.get("annoy", {})
     runner = mod_annoy.Annoy()
-    return runner, index_path, config, "annoy"
+    # the thread pool keeps the plain name, the results predate the choice
+    executor = config.get("executor", "thread")
+    name = "annoy" if executor == "thread" else f"annoy-{executor}"
+    return runner, index_path, config, name
+
+
+def thread_executor(dataset_config):
+    """dataset_config with annoy on its thread executor, for a mode whose
+    own threads call one instance: the process workers' segments are per
+    instance, not per call."""
+    return {
+        **dataset_config,
+        "annoy": {**dataset_config.get("annoy", {}), "executor": "thread"},
+    }
 
 
-def create_usearch(index_dir: str, dataset: str, dataset_config):
-    index_path = os.path.join(index_dir, f"{dataset}.usearch")
-    config = dataset_config.get("usearch", {})
-    runner = mod_usearch.Usearch()
-    return runner, index_path, config, "usearch"
+def usearch_creator(dtype: str):
+    def create_usearch(index_dir: str, dataset: str, dataset_config):
+        # every dtype searches with the same CONFIG, from its own file
+        name = mod_usearch.runner_name(dtype)
+        base = dataset if dtype == mod_usearch.DTYPE else f"{dataset}-{dtype}"
+        index_path = os.path.join(index_dir, f"{base}.usearch")
+        config = dataset_config.get("usearch", {})
+        runner = mod_usearch.Usearch(dtype)
+        return runner, index_path, config, name
+
+    return create_usearch
+
+
+create_usearch = usearch_creator(mod_usearch.DTYPE)
+
+
+def create_exact(index_dir: str, dataset: str, dataset_config):
+    index_path = os.path.join(index_dir, f"{dataset}.exact")
+    config = dataset_config.get("exact", {})
+    runner = mod_exact.Exact()
+    return runner, index_path, config, "exact"
 
 
 def runner_create_index(
     create_f,
     index_dir: str,
+    result_dir: str,
     dataset: str,
     dataset_config,
-    train: h5py.Dataset,
+    train: np.ndarray,
+    dataset_sha256: str,
     recreate_index: bool,
 ):
-    runner, index_path, config, _ = create_f(index_dir, dataset, dataset_config)
-    if not recreate_index and os.path.exists(index_path):
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    # rebuilt only when what the index was built from no longer matches
+    meta = registry.expected(runner, dataset_sha256, config)
+    reason = "--recreate-index" if recreate_index else None
+    reason = reason or registry.stale(index_path, meta)
+    if reason is None:
         return
-    runner.create_index(train[:], index_path, config)
-    pass
+    print(f"Building {index_path}: {reason}")
 
+    # train goes in mapped, every runner streams it in chunks
+    start_time = get_time()
+    peak_is_build = reset_peak_rss()
+    rss_before = rss_mb()
+    begin = time.perf_counter()
+    runner.create_index(train, index_path, config)
+    build_time = time.perf_counter() - begin
+    end_time = get_time()
+    registry.write(index_path, {**meta, "built": end_time})
 
-def save_bench(
+    save_index_build(
+        result_dir,
+        dataset,
+        runner_name,
+        train.shape,
+        meta,
+        build_time,
+        rss_before,
+        # without clear_refs the peak is the process', not the build's
+        peak_rss_mb() if peak_is_build else "",
+        os.path.getsize(index_path) / (1024 * 1024),
+        start_time,
+        end_time,
+    )
+    print(f"Index built in {build_time:.2f}s, peak RSS {peak_rss_mb():.0f}M")
+
+
+def save_index_build(
     result_dir: str,
     dataset: str,
-    tag: str,
     runner_name: str,
-    nb_runs: int,
+    shape,
+    meta,
+    build_time: float,
+    rss_before,
+    peak_rss,
+    index_mb: float,
     start_time: str,
     end_time: str,
-    mean_recall,
-    mean_time,
-    std_time,
-    mean_qps,
-    std_qps,
 ):
-    path = os.path.join(result_dir, f"{dataset}.csv")
+    path = os.path.join(result_dir, "index-build.csv")
     header = [
+        "dataset",
         "runner_name",
-        "nb_runs",
-        "tag",
-        "mean_recall",
-        "mean_time",
-        "std_time",
-        "mean_qps",
-        "std_qps",
+        "nvecs",
+        "dims",
+        *registry.STAMP_COLUMNS,
+        "build_time",
+        "rss_before_mb",
+        "peak_rss_mb",
+        "index_mb",
         "start_time",
         "end_time",
     ]
@@ -124,31 +235,32 @@ def save_bench(
             data_rows = [
                 row
                 for row in data_rows
-                if not (row[0] == runner_name and row[2] == tag)
+                if not (row[0] == dataset and row[1] == runner_name)
             ]
     else:
         data_rows = []
 
-    new_row = list(
-        map(
-            str,
-            [
-                runner_name,
-                nb_runs,
-                tag,
-                mean_recall,
-                mean_time,
-                std_time,
-                mean_qps,
-                std_qps,
-                start_time,
-                end_time,
-            ],
+    data_rows.append(
+        list(
+            map(
+                str,
+                [
+                    dataset,
+                    runner_name,
+                    shape[0],
+                    shape[1],
+                    *registry.build_stamp(meta),
+                    build_time,
+                    rss_before,
+                    peak_rss,
+                    index_mb,
+                    start_time,
+                    end_time,
+                ],
+            )
         )
     )
-
-    data_rows.append(new_row)
-    data_rows.sort(key=lambda r: (r[0], int(r[1]), r[2]))
+    data_rows.sort(key=lambda r: (r[0], r[1]))
 
     with open(path, mode="w", newline="") as f:
         writer = csv.writer(f)
@@ -156,16 +268,174 @@ def save_bench(
         writer.writerows(data_rows)
 
 
+def recall_per_query(pred: np.ndarray, neighbors: np.ndarray, k: int):
+    """Recall@k of every query, in one pass over the whole batch.
+
+    Each row is shifted into its own id range so a single searchsorted over
+    the flattened, row sorted ground truth answers every membership test.
+    Padding (-1, a runner that found fewer than k) never matches.
+    """
+    n = pred.shape[0]
+    true = np.sort(neighbors[:, :k], axis=1).astype(np.int64)
+    span = int(max(true.max(), pred.max())) + 2
+    offsets = np.arange(n, dtype=np.int64)[:, None] * span
+    flat_true = (true + 1 + offsets).ravel()
+    flat_pred = (pred + 1 + offsets).ravel()
+    pos = np.searchsorted(flat_true, flat_pred).clip(max=flat_true.size - 1)
+    hits = (flat_true[pos] == flat_pred).reshape(n, -1).sum(axis=1)
+    return hits / k
+
+
+def holds_gil(runner, tag: str, mode: str) -> bool:
+    """Whether runner keeps the GIL while it searches, saying so if it does.
+
+    Single queries from a pool of Python threads then run one at a time,
+    and what a per query mode reports of it is GIL contention, not the
+    index: such a runner is skipped by those modes.
+    """
+    if not getattr(runner, "HOLDS_GIL", False):
+        return False
+    print(
+        f"[{tag}] Skipping {mode} for {type(runner).__name__}: its search"
+        " holds the GIL, concurrent queries would run one at a time"
+    )
+    return True
+
+
+def query_latency(runner, test: np.ndarray, k: int, pool):
+    """The batch as single queries spread over the pool, each one timed.
+
+    Every query owns its slot in `latencies`, so the threads never share a
+    histogram: it is filled once, from the whole array, after the batch.
+    """
+    n = test.shape[0]
+    pred = np.full((n, k), -1, dtype=np.int64)
+    latencies = np.empty(n, dtype=np.int64)
+
+    def query_f(i):
+        begin = time.perf_counter_ns()
+        found = runner.query(test[i], k)
+        latencies[i] = time.perf_counter_ns() - begin
+        pred[i, : len(found)] = found
+
+    start_time = time.perf_counter()
+    pool.map(query_f, range(n))
+    end_time = time.perf_counter()
+    total_time = end_time - start_time
+
+    hist = LatencyHistogram()
+    hist.record(latencies)
+    return pred, total_time, hist
+
+
+def latency_columns(hist: LatencyHistogram | None):
+    if hist is None:
+        return [""] * len(LATENCY_PERCENTILES)
+    return [hist.percentile(q) / 1e3 for q, _ in LATENCY_PERCENTILES]
+
+
+def _upsert_rows(path: str, header, rows, runner_name: str, tag: str, sort_key):
+    """Rewrite the CSV at path with rows in place of the ones it had for
+    runner_name and tag, every row sorted by sort_key.
+
+    The rows kept are matched to header by column name, so a file written
+    before a column was added gets it empty instead of shifted.
+    """
+    kept = []
+    if os.path.isfile(path):
+        with open(path, mode="r", newline="") as f:
+            kept = [
+                [row.get(column) or "" for column in header]
+                for row in csv.DictReader(f)
+                if not (row["runner_name"] == runner_name and row["tag"] == tag)
+            ]
+    kept.extend(list(map(str, row)) for row in rows)
+    kept.sort(key=sort_key)
+
+    with open(path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(kept)
+
+
+def save_bench(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    nb_runs: int,
+    start_time: str,
+    end_time: str,
+    mean_recall,
+    mean_time,
+    std_time,
+    mean_qps,
+    std_qps,
+    hist: LatencyHistogram | None,
+    meta: dict | None,
+    advice: str = "none",
+    advise_time: float = 0.0,
+    index_mb: float | str = "",
+    mode: str = "batch",
+):
+    path = os.path.join(result_dir, f"{dataset}.csv")
+    header = [
+        "runner_name",
+        "nb_runs",
+        "tag",
+        "mean_recall",
+        "mean_time",
+        "std_time",
+        "mean_qps",
+        "std_qps",
+        "start_time",
+        "end_time",
+        *(column for _, column in LATENCY_PERCENTILES),
+        "advice",
+        "advise_time",
+        "index_mb",
+        "mode",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    row = [
+        runner_name,
+        nb_runs,
+        tag,
+        mean_recall,
+        mean_time,
+        std_time,
+        mean_qps,
+        std_qps,
+        start_time,
+        end_time,
+        *latency_columns(hist),
+        advice,
+        advise_time,
+        index_mb,
+        mode,
+        *registry.build_stamp(meta),
+    ]
+
+    _upsert_rows(
+        path, header, [row], runner_name, tag, lambda r: (r[0], int(r[1]), r[2])
+    )
+
+
 def save_bench_details(
     result_dir: str,
     dataset: str,
     tag: str,
     runner_name: str,
     recalls,
+    query_recalls,
     total_times,
     qpss,
     run_start_times,
     run_end_times,
+    hists,
+    usages,
+    advice: str = "none",
 ):
     path = os.path.join(result_dir, f"{dataset}-details.csv")
     header = [
@@ -177,48 +447,143 @@ def save_bench_details(
         "qps",
         "start_time",
         "end_time",
+        "min_recall",
+        "p10_recall",
+        *(column for _, column in LATENCY_PERCENTILES),
+        *usage.USAGE_COLUMNS,
+        "advice",
     ]
 
-    if os.path.isfile(path):
-        with open(path, mode="r", newline="") as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            data_rows = rows[1:] if len(rows) > 1 else []
-            data_rows = [
-                row
-                for row in data_rows
-                if not (row[0] == runner_name and row[1] == tag)
+    rows = []
+    for i, (
+        recall,
+        query_recall,
+        total_time,
+        qps,
+        run_start_time,
+        run_end_time,
+        hist,
+        run_usage,
+    ) in enumerate(
+        zip(
+            recalls,
+            query_recalls,
+            total_times,
+            qpss,
+            run_start_times,
+            run_end_times,
+            hists,
+            usages,
+        ),
+        1,
+    ):
+        rows.append(
+            [
+                runner_name,
+                tag,
+                i,
+                recall,
+                total_time,
+                qps,
+                run_start_time,
+                run_end_time,
+                query_recall.min(),
+                np.percentile(query_recall, 10),
+                *latency_columns(hist),
+                *run_usage,
+                advice,
             ]
-    else:
-        data_rows = []
+        )
 
-    for i, (recall, total_time, qps, run_start_time, run_end_time) in enumerate(
-        zip(recalls, total_times, qpss, run_start_times, run_end_times), 1
-    ):
-        data_rows.append(
-            list(
-                map(
-                    str,
-                    [
-                        runner_name,
-                        tag,
-                        i,
-                        recall,
-                        total_time,
-                        qps,
-                        run_start_time,
-                        run_end_time,
-                    ],
-                )
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], int(r[2]))
+    )
+
+
+def save_bench_nodes(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    shards: NodeShards,
+    node_runs,
+):
+    path = os.path.join(result_dir, f"{dataset}-nodes.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "run_id",
+        "node",
+        "threads",
+        "queries",
+        "time",
+        "qps",
+        "cpus",
+    ]
+
+    rows = []
+    for i, nodes in enumerate(node_runs, 1):
+        for node, (queries, node_time) in nodes.items():
+            rows.append(
+                [
+                    runner_name,
+                    tag,
+                    i,
+                    node,
+                    shards.threads[node],
+                    queries,
+                    node_time,
+                    queries / node_time,
+                    " ".join(str(cpu) for cpu in shards.cpus[node]),
+                ]
             )
-        )
 
-    data_rows.sort(key=lambda r: (r[0], r[1], int(r[2])))
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], int(r[2]), int(r[3])),
+    )
 
-    with open(path, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        writer.writerows(data_rows)
+
+def save_bench_replicas(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    replicas: NodeReplicas,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-replicas.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "node",
+        "threads",
+        "load_time",
+        "footprint_mb",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+    for node in replicas.pools:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                node,
+                replicas.threads[node],
+                replicas.load_times[node],
+                replicas.footprint[node],
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], int(r[2]))
+    )
 
 
 def runner_bench(
@@ -227,29 +592,78 @@ def runner_bench(
     result_dir: str,
     dataset: str,
     dataset_config,
-    train: h5py.Dataset,
-    test: h5py.Dataset,
-    neighbors: h5py.Dataset,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
     tag: str,
     threads: int,
     running_time: int,
+    latency: bool,
+    shard: bool,
+    replica: bool = False,
+    advice: str = "none",
 ):
     runner, index_path, config, runner_name = create_f(
         index_dir, dataset, dataset_config
     )
-    runner.load_index(train, index_path, threads, config)
+    # how test is served: one query_batch, or single queries from threads
+    if replica:
+        mode = "replica"
+    elif shard:
+        mode = "shard"
+    elif latency:
+        mode = "latency"
+    else:
+        mode = "batch"
+    # one latency thread has nothing to contend with
+    concurrent = mode in ("shard", "replica") or (
+        mode == "latency" and threads > 1
+    )
+    if concurrent and holds_gil(runner, tag, mode):
+        return
+    pool = None
+    shards = None
+    advise_time = 0.0
+    if replica:
+        # the replicas are the only copies: the shared one is never loaded,
+        # and nothing of theirs is mapped from the index file to advise
+        if advice != "none":
+            print(f"[{tag}] --advice {advice} does not apply to replicas")
+            advice = "none"
+        shards = NodeReplicas(threads)
+        shards.load(create_f, index_dir, dataset, dataset_config, train)
+    else:
+        runner.load_index(train, index_path, threads, config)
+        if shard:
+            shards = NodeShards(threads)
+        elif latency:
+            pool = multiprocessing.pool.ThreadPool(threads)
+
+        # the index as mapped, and train where it is what is searched
+        paths = [index_path]
+        if getattr(runner, "SEARCHES_TRAIN", False):
+            paths.append(train.filename)
+        advised, advise_time = advise.apply(paths, advice)
+        if advice != "none":
+            print(
+                f"[{tag}] advised {advised / 2**20:.0f}M {advice} in "
+                f"{advise_time:.2f}s"
+            )
 
     k = neighbors.shape[1]
-    total = neighbors.shape[0] * k
     n = test.shape[0]
     mean_time = 0
     std_time = 0
 
     recalls = []
+    query_recalls = []
     total_times = []
     qpss = []
     run_start_times = []
     run_end_times = []
+    hists = []
+    usages = []
+    node_runs = []
 
     begin = time.time()
     start_time = get_time()
@@ -257,23 +671,35 @@ def runner_bench(
     nb_runs = 0
     while True:
         run_start_time = get_time()
-        pred_vecs, total_time = runner.query_batch(test, k)
+        usage_before = usage.snapshot()
+        if replica:
+            pred_vecs, total_time, hist, nodes = shards.query_batch(test, k)
+            node_runs.append(nodes)
+        elif shards is not None:
+            pred_vecs, total_time, hist, nodes = shards.query_batch(
+                runner, test, k
+            )
+            node_runs.append(nodes)
+        elif pool is not None:
+            pred_vecs, total_time, hist = query_latency(runner, test, k, pool)
+        else:
+            pred_vecs, total_time = runner.query_batch(test, k)
+            hist = None
+        usage_after = usage.snapshot()
         run_end_time = get_time()
-        hits = 0
-
-        for i, pred_indices in enumerate(pred_vecs):
-            pred_keys = pred_indices
-            true_keys = neighbors[i][:k].tolist()
-            hits += len(set(pred_keys) & set(true_keys))
 
-        recall = hits / total
+        query_recall = recall_per_query(pred_vecs, neighbors, k)
+        recall = query_recall.mean()
         qps = n / total_time
 
         recalls.append(recall)
+        query_recalls.append(query_recall)
         total_times.append(total_time)
         qpss.append(qps)
         run_start_times.append(run_start_time)
         run_end_times.append(run_end_time)
+        hists.append(hist)
+        usages.append(usage.delta(usage_before, usage_after))
 
         mean_time = np.mean(total_times)
         std_time = np.std(total_times)
@@ -286,7 +712,8 @@ def runner_bench(
 
         print(
             f"Run {nb_runs}/{max_nb_runs} [{tag}] run {total_time:.2f}s QPS {qps:.2f} "
-            f"elapsed {elapsed_time:.2f}s mean {mean_time:.2f}s +- {std_time:.4f}s"
+            f"elapsed {elapsed_time:.2f}s mean {mean_time:.2f}s +- {std_time:.4f}s "
+            f"faults {usages[-1][0]}/{usages[-1][1]}"
         )
 
         # MAX_TIME caps the run-count mode only, --running-time wins
@@ -297,8 +724,16 @@ def runner_bench(
             break
 
     end_time = get_time()
+    if pool is not None:
+        pool.close()
+    if shards is not None:
+        shards.close()
 
     mean_recall = np.mean(recalls)
+    total_hist = None
+    for hist in hists:
+        if hist is not None:
+            total_hist = (total_hist or LatencyHistogram()).merge(hist)
     mean_qps = np.mean(qpss)
     std_qps = np.std(qpss)
 
@@ -315,6 +750,12 @@ def runner_bench(
         std_time,
         mean_qps,
         std_qps,
+        total_hist,
+        registry.read(index_path),
+        advice,
+        advise_time,
+        os.path.getsize(index_path) / (1024 * 1024),
+        mode,
     )
 
     save_bench_details(
@@ -323,111 +764,1867 @@ def runner_bench(
         tag,
         runner_name,
         recalls,
+        query_recalls,
         total_times,
         qpss,
         run_start_times,
         run_end_times,
+        hists,
+        usages,
+        advice,
     )
 
+    if shards is not None:
+        save_bench_nodes(
+            result_dir, dataset, tag, runner_name, shards, node_runs
+        )
+        if replica:
+            save_bench_replicas(
+                result_dir,
+                dataset,
+                tag,
+                runner_name,
+                shards,
+                registry.read(index_path),
+            )
+        for node in shards.pools:
+            node_qps = [nodes[node][0] / nodes[node][1] for nodes in node_runs]
+            print(
+                f"[{tag}] node{node} QPS: {np.mean(node_qps):.2f} ± {np.std(node_qps):.2f}"
+            )
+
+    if total_hist is not None:
+        print(
+            f"[{tag}] Latency "
+            + "  ".join(
+                f"p{q}: {value:.1f}us"
+                for (q, _), value in zip(
+                    LATENCY_PERCENTILES, latency_columns(total_hist)
+                )
+            )
+        )
     print(
         f"[{tag}] Recall@{k}: {mean_recall:.4f}  Time: {mean_time:.4f} ± {std_time:.4f}s  QPS: {mean_qps:.2f} ± {std_qps:.2f}"
     )
 
 
-def run(
-    data_dir: str,
-    index_dir: str,
+def save_bench_load(
     result_dir: str,
-    datasets,
-    faiss: bool,
-    annoy: bool,
-    usearch: bool,
-    bench: bool,
-    recreate_index: bool,
+    dataset: str,
     tag: str,
+    runner_name: str,
     threads: int,
-    running_time: int,
+    duration: int,
+    points,
+    meta: dict | None,
 ):
-    os.makedirs(data_dir, exist_ok=True)
-    os.makedirs(index_dir, exist_ok=True)
-    os.makedirs(result_dir, exist_ok=True)
+    path = os.path.join(result_dir, f"{dataset}-load.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "target_qps",
+        "threads",
+        "duration",
+        "queries",
+        "offered_qps",
+        "achieved_qps",
+        "mean_us",
+        *(column for _, column in LATENCY_PERCENTILES),
+        *(f"service_{column}" for _, column in LATENCY_PERCENTILES),
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
 
-    for dataset in datasets:
-        print(f"-- Dataset {dataset} --")
-        path = os.path.join(data_dir, dataset)
-        download_data(dataset, path)
-
-        with h5py.File(path, "r") as f:
-            train = f["train"]
-            test = f["test"]
-            neighbors = f["neighbors"]
-            if not isinstance(train, h5py.Dataset):
-                raise TypeError(f"'train' is not a dataset but {type(train)}")
-            if not isinstance(test, h5py.Dataset):
-                raise TypeError(f"'test' is not a dataset but {type(test)}")
-            if not isinstance(neighbors, h5py.Dataset):
-                raise TypeError(
-                    f"'neighbors' is not a dataset but {type(neighbors)}"
-                )
+    rows = []
+    for target_qps, point, start_time, end_time in points:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                target_qps,
+                threads,
+                duration,
+                point["queries"],
+                point["offered_qps"],
+                point["achieved_qps"],
+                point["response"].mean() / 1e3,
+                *latency_columns(point["response"]),
+                *latency_columns(point["service"]),
+                start_time,
+                end_time,
+                *registry.build_stamp(meta),
+            ]
+        )
 
-            dataset_base, _ = os.path.splitext(dataset)
-            dataset_config = CONFIG.get(dataset, {})
-            # train stays lazy: the bench only reads its shape, and
-            # materialising it costs 3.8G of anon that nothing ever touches
-            # again. runner_create_index pulls it in when it has to build.
-            test = test[:]
-            neighbors = neighbors[:]
-
-            if faiss:
-                runner_create_index(
-                    create_faiss,
-                    index_dir,
-                    dataset_base,
-                    dataset_config,
-                    train,
-                    recreate_index,
-                )
-            if annoy:
-                runner_create_index(
-                    create_annoy,
-                    index_dir,
-                    dataset_base,
-                    dataset_config,
-                    train,
-                    recreate_index,
-                )
-            if usearch:
-                runner_create_index(
-                    create_usearch,
-                    index_dir,
-                    dataset_base,
-                    dataset_config,
-                    train,
-                    recreate_index,
-                )
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], float(r[2])),
+    )
 
-            if bench:
-                sync_drop_caches()
 
-                if faiss:
-                    print("== Benching Faiss ==")
-                    runner_bench(
-                        create_faiss,
-                        index_dir,
-                        result_dir,
-                        dataset_base,
-                        dataset_config,
-                        train,
-                        test,
-                        neighbors,
-                        tag,
+def runner_load(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    k: int,
+    tag: str,
+    threads: int,
+    duration: int,
+    target_qpss,
+):
+    """Open loop latency at every offered load, lowest first."""
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    # even one worker would hold up the generator releasing the arrivals
+    if holds_gil(runner, tag, "open loop"):
+        return
+    runner.load_index(train, index_path, threads, config)
+
+    points = []
+    for target_qps in sorted(target_qpss):
+        start_time = get_time()
+        point = open_loop(runner, test, k, threads, target_qps, duration)
+        end_time = get_time()
+        points.append((target_qps, point, start_time, end_time))
+
+        p50, p99, p999 = latency_columns(point["response"])
+        print(
+            f"[{tag}] offered {point['offered_qps']:.1f}/{target_qps} QPS "
+            f"achieved {point['achieved_qps']:.1f} QPS "
+            f"p50 {p50:.1f}us p99 {p99:.1f}us p99.9 {p999:.1f}us"
+        )
+
+    save_bench_load(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        threads,
+        duration,
+        points,
+        registry.read(index_path),
+    )
+
+
+def save_bench_server(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    threads: int,
+    duration: int,
+    load_time: float,
+    points,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-server.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "concurrency",
+        "threads",
+        "duration",
+        "queries",
+        "qps",
+        "recall",
+        "load_time",
+        "mean_us",
+        *(column for _, column in LATENCY_PERCENTILES),
+        *(f"service_{column}" for _, column in LATENCY_PERCENTILES),
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+    for concurrency, point, start_time, end_time in points:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                concurrency,
+                threads,
+                duration,
+                point["queries"],
+                point["qps"],
+                point["recall"],
+                load_time,
+                point["response"].mean() / 1e3,
+                *latency_columns(point["response"]),
+                *latency_columns(point["service"]),
+                start_time,
+                end_time,
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], int(r[2]))
+    )
+
+
+def runner_server(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+    duration: int,
+    concurrencies,
+):
+    """End to end latency through the socket server, at every client
+    concurrency, lowest first."""
+    # the server loads annoy on its thread executor, name the rows so
+    dataset_config = thread_executor(dataset_config)
+    runner, index_path, _, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    # the server's event loop would wait on the executor's searches too
+    if holds_gil(runner, tag, "server"):
+        return
+    k = neighbors.shape[1]
+    server = QueryServer(
+        create_f, index_dir, dataset, dataset_config, train, threads
+    )
+
+    points = []
+    for concurrency in sorted(concurrencies):
+        start_time = get_time()
+        point = replay(server.path, test, k, concurrency, duration)
+        end_time = get_time()
+        point["recall"] = recall_per_query(point["pred"], neighbors, k).mean()
+        points.append((concurrency, point, start_time, end_time))
+
+        p50, p99, p999 = latency_columns(point["response"])
+        s50, s99, _ = latency_columns(point["service"])
+        print(
+            f"[{tag}] concurrency={concurrency} Recall@{k}: "
+            f"{point['recall']:.4f}  QPS: {point['qps']:.1f}  "
+            f"p50 {p50:.1f}us p99 {p99:.1f}us p99.9 {p999:.1f}us  "
+            f"(search p50 {s50:.1f}us p99 {s99:.1f}us)"
+        )
+    server.close()
+
+    save_bench_server(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        threads,
+        duration,
+        server.load_time,
+        points,
+        registry.read(index_path),
+    )
+
+
+def save_bench_write(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    threads: int,
+    duration: int,
+    points,
+    meta: dict | None,
+):
+    """<dataset>-write.csv, a row per write rate, and <dataset>-write-runs.csv,
+    a row per reader pass over test."""
+    path = os.path.join(result_dir, f"{dataset}-write.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "write_rate",
+        "threads",
+        "duration",
+        "inserted",
+        "achieved_write_rate",
+        "mean_add_ms",
+        "saves",
+        "mean_save_s",
+        "nb_runs",
+        "mean_qps",
+        "std_qps",
+        "recall_start",
+        "recall_end",
+        "recall_drift",
+        "stale_recall_end",
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+    runs_path = os.path.join(result_dir, f"{dataset}-write-runs.csv")
+    runs_header = [
+        "runner_name",
+        "tag",
+        "write_rate",
+        "run",
+        "elapsed",
+        "inserted",
+        "qps",
+        "recall",
+        "stale_recall",
+    ]
+
+    rows = []
+    runs_rows = []
+    for point in points:
+        runs = point["runs"]
+        qpss = [run["qps"] for run in runs]
+        rows.append(
+            [
+                runner_name,
+                tag,
+                point["write_rate"],
+                threads,
+                duration,
+                point["inserted"],
+                point["achieved_write_rate"],
+                point["mean_add_ms"],
+                point["saves"],
+                point["mean_save_s"],
+                len(runs),
+                np.mean(qpss),
+                np.std(qpss),
+                runs[0]["recall"],
+                runs[-1]["recall"],
+                runs[-1]["recall"] - runs[0]["recall"],
+                runs[-1]["stale_recall"],
+                point["start_time"],
+                point["end_time"],
+                *registry.build_stamp(meta),
+            ]
+        )
+        for i, run in enumerate(runs):
+            runs_rows.append(
+                [
+                    runner_name,
+                    tag,
+                    point["write_rate"],
+                    i,
+                    run["elapsed"],
+                    run["inserted"],
+                    run["qps"],
+                    run["recall"],
+                    run["stale_recall"],
+                ]
+            )
+
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], float(r[2])),
+    )
+    _upsert_rows(
+        runs_path,
+        runs_header,
+        runs_rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], float(r[2]), int(r[3])),
+    )
+
+
+def runner_write(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+    duration: int,
+    write_rates,
+):
+    """Readers pass over test again and again while a writer inserts, at
+    every write rate, lowest first.
+
+    Each rate starts from the index as built, loaded into memory: a mapped
+    index cannot take inserts. Recall is against the exact neighbors of what
+    the index holds at the end of the pass, stale recall against the
+    dataset's own.
+    """
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    if not hasattr(runner, "add"):
+        print(f"[{tag}] {runner_name} cannot insert, nothing to write")
+        return
+    k = neighbors.shape[1]
+    n = test.shape[0]
+    metric = "angular" if "angular" in dataset else "euclidean"
+    path = ingest.live_path(index_path)
+
+    points = []
+    for write_rate in sorted(write_rates):
+        runner.load_replica(train, index_path, threads, config)
+        truth = ingest.TrueNeighbors(train, test, neighbors, metric)
+        writer = ingest.Writer(runner, train, write_rate, path)
+        folded = 0
+
+        start_time = get_time()
+        begin = time.time()
+        writer.start()
+        runs = []
+        while True:
+            pred_vecs, total_time = writer.query_batch(test, k)
+            # everything added by now, some of it maybe during the pass
+            inserted = writer.count
+            for start, vectors in writer.inserted[folded:]:
+                truth.extend(start, vectors)
+                folded += 1
+            runs.append(
+                {
+                    "elapsed": time.time() - begin,
+                    "inserted": inserted,
+                    "qps": n / total_time,
+                    "recall": recall_per_query(pred_vecs, truth.ids, k).mean(),
+                    "stale_recall": recall_per_query(
+                        pred_vecs, neighbors, k
+                    ).mean(),
+                }
+            )
+            if time.time() - begin >= duration:
+                break
+        writer.stop()
+        end_time = get_time()
+
+        point = {
+            "write_rate": write_rate,
+            "inserted": writer.count,
+            "achieved_write_rate": writer.count / writer.elapsed,
+            "mean_add_ms": (
+                np.mean(writer.add_times) * 1e3 if writer.add_times else 0
+            ),
+            "saves": len(writer.save_times),
+            "mean_save_s": (
+                np.mean(writer.save_times) if writer.save_times else 0
+            ),
+            "runs": runs,
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        points.append(point)
+
+        qpss = [run["qps"] for run in runs]
+        print(
+            f"[{tag}] write rate {write_rate}/s inserted {writer.count} "
+            f"QPS: {np.mean(qpss):.2f} ± {np.std(qpss):.2f}  Recall@{k}: "
+            f"{runs[0]['recall']:.4f} -> {runs[-1]['recall']:.4f} "
+            f"(stale {runs[-1]['stale_recall']:.4f})"
+        )
+
+    save_bench_write(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        threads,
+        duration,
+        points,
+        registry.read(index_path),
+    )
+
+
+def save_bench_cache(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    points,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-cache.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "zipf",
+        "cache_size",
+        "queries",
+        "distinct",
+        "hit_ratio",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "backend_queries",
+        "backend_qps",
+        "std_backend_qps",
+        "nb_runs",
+        *usage.USAGE_COLUMNS,
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+    for point in points:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                point["zipf"],
+                point["cache_size"],
+                point["queries"],
+                point["distinct"],
+                point["hit_ratio"],
+                point["recall"],
+                point["mean_qps"],
+                point["std_qps"],
+                point["backend_queries"],
+                point["backend_qps"],
+                point["std_backend_qps"],
+                CACHE_RUNS,
+                *point["usage"],
+                point["start_time"],
+                point["end_time"],
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], float(r[2]), int(r[3])),
+    )
+
+
+def runner_cache(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+    shard: bool,
+    replica: bool,
+    cache_sizes,
+    zipf: float,
+):
+    """A Zipfian stream over test through an LRU cache of every size.
+
+    The backend behind the cache is what runner_bench would run, --shard
+    and --replica included, so its QPS on the misses says what is left of
+    a placement's gain once the hot queries stop reaching it.
+    """
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    if (replica or shard) and holds_gil(
+        runner, tag, "replica" if replica else "shard"
+    ):
+        return
+    k = neighbors.shape[1]
+    n = test.shape[0]
+
+    shards = None
+    if replica:
+        shards = NodeReplicas(threads)
+        shards.load(create_f, index_dir, dataset, dataset_config, train)
+
+        def backend(queries):
+            pred, total_time, _, _ = shards.query_batch(queries, k)
+            return pred, total_time
+
+    else:
+        runner.load_index(train, index_path, threads, config)
+        if shard:
+            shards = NodeShards(threads)
+
+            def backend(queries):
+                pred, total_time, _, _ = shards.query_batch(runner, queries, k)
+                return pred, total_time
+
+        else:
+
+            def backend(queries):
+                return runner.query_batch(queries, k)
+
+    stream = zipf_stream(n, CACHE_PASSES * n, zipf)
+    distinct = len(np.unique(stream))
+    # fault the index in first: whichever size came first would pay for it
+    backend(test)
+
+    points = []
+    for cache_size in sorted(cache_sizes):
+        start_time = get_time()
+        qpss, backend_qpss = [], []
+        usage_before = usage.snapshot()
+        for _ in range(CACHE_RUNS):
+            point = replay_cached(
+                backend, test, k, stream, LRUCache(cache_size)
+            )
+            qpss.append(len(stream) / point["elapsed"])
+            backend_qpss.append(
+                point["backend_queries"] / point["backend_time"]
+            )
+        usage_after = usage.snapshot()
+        end_time = get_time()
+
+        points.append(
+            {
+                "zipf": zipf,
+                "cache_size": cache_size,
+                "queries": len(stream),
+                "distinct": distinct,
+                "hit_ratio": point["hits"] / len(stream),
+                "recall": recall_per_query(
+                    point["pred"], neighbors[stream], k
+                ).mean(),
+                "mean_qps": np.mean(qpss),
+                "std_qps": np.std(qpss),
+                "backend_queries": point["backend_queries"],
+                "backend_qps": np.mean(backend_qpss),
+                "std_backend_qps": np.std(backend_qpss),
+                "usage": usage.delta(usage_before, usage_after),
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+        )
+        print(
+            f"[{tag}] zipf={zipf} cache={cache_size} hit ratio "
+            f"{points[-1]['hit_ratio']:.3f}  Recall@{k}: "
+            f"{points[-1]['recall']:.4f}  QPS: {np.mean(qpss):.2f}  "
+            f"backend QPS: {np.mean(backend_qpss):.2f} on "
+            f"{point['backend_queries']} queries"
+        )
+
+    if shards is not None:
+        shards.close()
+
+    save_bench_cache(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        points,
+        registry.read(index_path),
+    )
+
+
+def save_bench_tenants(
+    result_dir: str,
+    tag: str,
+    runner_name: str,
+    points,
+    nodes,
+    start_time: str,
+    end_time: str,
+):
+    """tenants.csv, a row per tenant, and tenants-nodes.csv, a row per node
+    and tenant plus an "all" row with the node's page cache growth."""
+    path = os.path.join(result_dir, "tenants.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "dataset",
+        "tenants",
+        "threads",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "nb_runs",
+        "queries",
+        "elapsed",
+        "load_time",
+        "footprint_mb",
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+    nodes_path = os.path.join(result_dir, "tenants-nodes.csv")
+    nodes_header = [
+        "runner_name",
+        "tag",
+        "node",
+        "dataset",
+        "footprint_mb",
+        "page_cache_mb",
+    ]
+
+    rows = []
+    nodes_rows = []
+    for point in points:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                point["dataset"],
+                len(points),
+                point["threads"],
+                point["recall"],
+                point["mean_qps"],
+                point["std_qps"],
+                point["nb_runs"],
+                point["queries"],
+                point["elapsed"],
+                point["load_time"],
+                sum(point["footprint"].values()),
+                start_time,
+                end_time,
+                *registry.build_stamp(point["meta"]),
+            ]
+        )
+    for node, page_cache in nodes.items():
+        for point in points:
+            nodes_rows.append(
+                [
+                    runner_name,
+                    tag,
+                    node,
+                    point["dataset"],
+                    point["footprint"].get(node, 0),
+                    "",
+                ]
+            )
+        nodes_rows.append(
+            [
+                runner_name,
+                tag,
+                node,
+                "all",
+                sum(point["footprint"].get(node, 0) for point in points),
+                page_cache,
+            ]
+        )
+
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], r[2])
+    )
+    _upsert_rows(
+        nodes_path,
+        nodes_header,
+        nodes_rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], int(r[2]), r[3]),
+    )
+
+
+def runner_tenants(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    tenants,
+    tag: str,
+    tenant_threads,
+    replica: bool,
+    duration: int,
+):
+    """Every dataset's index served at once, one process per tenant.
+
+    tenants is (dataset, dataset_config, train, test, neighbors) per
+    dataset, tenant_threads the threads each gets. They all load, then
+    start together and run for duration: QPS per tenant, and what they hold
+    on every node between them once loaded.
+    """
+    if replica:
+        runner, *_ = create_f(index_dir, *tenants[0][:2])
+        if holds_gil(runner, tag, "replica"):
+            return
+    page_cache_before = node_file_pages_mb()
+    start = multiprocessing.get_context("fork").Event()
+    procs = [
+        Tenant(
+            create_f,
+            index_dir,
+            dataset,
+            dataset_config,
+            train,
+            test,
+            neighbors.shape[1],
+            threads,
+            replica,
+            duration,
+            start,
+        )
+        for (dataset, dataset_config, train, test, neighbors), threads in zip(
+            tenants, tenant_threads
+        )
+    ]
+    try:
+        for proc in procs:
+            proc.loaded()
+        footprints = [proc.footprint() for proc in procs]
+        page_cache_after = node_file_pages_mb()
+
+        start_time = get_time()
+        start.set()
+        results = [proc.result() for proc in procs]
+        end_time = get_time()
+    finally:
+        for proc in procs:
+            proc.close()
+
+    points = []
+    for (
+        (dataset, dataset_config, _, _, neighbors),
+        proc,
+        footprint,
+        result,
+    ) in zip(tenants, procs, footprints, results):
+        _, index_path, _, runner_name = create_f(
+            index_dir, dataset, dataset_config
+        )
+        k = neighbors.shape[1]
+        point = {
+            "dataset": dataset,
+            "threads": proc.threads,
+            "recall": recall_per_query(result["pred"], neighbors, k).mean(),
+            "mean_qps": np.mean(result["qpss"]),
+            "std_qps": np.std(result["qpss"]),
+            "nb_runs": len(result["qpss"]),
+            "queries": result["queries"],
+            "elapsed": result["elapsed"],
+            "load_time": proc.load_time,
+            "footprint": footprint,
+            "meta": registry.read(index_path),
+        }
+        points.append(point)
+        print(
+            f"[{tag}] {dataset} threads={proc.threads} Recall@{k}: "
+            f"{point['recall']:.4f}  QPS: {point['mean_qps']:.2f} ± "
+            f"{point['std_qps']:.2f}  resident "
+            + " ".join(
+                f"node{node}={mb:.0f}M" for node, mb in footprint.items()
+            )
+        )
+
+    nodes = {
+        node: page_cache_after[node] - page_cache_before.get(node, 0)
+        for node in page_cache_after
+    }
+    print(
+        f"[{tag}] {len(points)} tenants resident "
+        + " ".join(
+            f"node{node}="
+            f"{sum(point['footprint'].get(node, 0) for point in points):.0f}M"
+            f" (page cache {page_cache:+.0f}M)"
+            for node, page_cache in nodes.items()
+        )
+    )
+
+    save_bench_tenants(
+        result_dir, tag, runner_name, points, nodes, start_time, end_time
+    )
+
+
+def runner_cold(
+    create_f,
+    index_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    k: int,
+    tag: str,
+    threads: int,
+    duration: int,
+):
+    """From a cold page cache: when the index is open, when the first query
+    is answered, and the queries answered in every second after that.
+
+    Printed as one COLD line for cold_start.py, which started the process:
+    the stamps are CLOCK_MONOTONIC, the clock it stamped the start with.
+    """
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    open_begin = time.monotonic_ns()
+    runner.load_index(train, index_path, threads, config)
+    opened = time.monotonic_ns()
+    runner.query(test[0], k)
+    first = time.monotonic_ns()
+
+    n = test.shape[0]
+    counts = []
+    count = 0
+    bucket_end = first + 10**9
+    start = 0
+    while time.monotonic_ns() - first < duration * 10**9:
+        batch = test[start : start + COLD_BATCH]
+        runner.query_batch(batch, k)
+        start = (start + COLD_BATCH) % n
+        count += len(batch)
+        now = time.monotonic_ns()
+        while now >= bucket_end:
+            counts.append(count)
+            count = 0
+            bucket_end += 10**9
+
+    print(
+        f"[{tag}] open {(opened - open_begin) / 1e9:.2f}s, first query "
+        f"{(first - opened) / 1e6:.1f}ms, then "
+        + " ".join(str(count) for count in counts[:10])
+        + " queries/s"
+    )
+    print(
+        f"COLD runner={runner_name} open_begin_ns={open_begin} "
+        f"open_ns={opened} first_ns={first} "
+        f"ops={','.join(str(count) for count in counts)}"
+    )
+
+
+def pareto(points):
+    """Indices of the points no other point beats on both recall and QPS."""
+    order = sorted(
+        range(len(points)),
+        key=lambda i: (-points[i]["recall"], -points[i]["mean_qps"]),
+    )
+    frontier = []
+    best_qps = -1.0
+    for i in order:
+        if points[i]["mean_qps"] > best_qps:
+            frontier.append(i)
+            best_qps = points[i]["mean_qps"]
+    return frontier
+
+
+def save_bench_sweep(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    param: str,
+    target_recall: float,
+    points,
+    frontier,
+    picked,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-sweep.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "param",
+        "value",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "nb_runs",
+        "pareto",
+        "picked",
+        "target_recall",
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+    for i, point in enumerate(points):
+        rows.append(
+            [
+                runner_name,
+                tag,
+                param,
+                point["value"],
+                point["recall"],
+                point["mean_qps"],
+                point["std_qps"],
+                SWEEP_RUNS,
+                int(i in frontier),
+                int(i == picked),
+                target_recall,
+                point["start_time"],
+                point["end_time"],
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], int(r[3]))
+    )
+
+
+def thread_counts(threads: int) -> list[int]:
+    """1, 2, 4, ... below threads, then threads itself."""
+    counts = [1]
+    while counts[-1] * 2 < threads:
+        counts.append(counts[-1] * 2)
+    if threads > 1:
+        counts.append(threads)
+    return counts
+
+
+def save_bench_scaling(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    points,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-scaling.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "threads",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "nb_runs",
+        "speedup",
+        "efficiency",
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+
+    # against one thread: speedup over it, and that speedup per thread
+    base_qps = points[0]["mean_qps"]
+    for point in points:
+        speedup = point["mean_qps"] / base_qps
+        rows.append(
+            [
+                runner_name,
+                tag,
+                point["threads"],
+                point["recall"],
+                point["mean_qps"],
+                point["std_qps"],
+                SCALING_RUNS,
+                speedup,
+                speedup / point["threads"],
+                point["start_time"],
+                point["end_time"],
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path, header, rows, runner_name, tag, lambda r: (r[0], r[1], int(r[2]))
+    )
+
+
+def submit_batches(
+    runner, test: np.ndarray, k: int, batch_size: int, concurrency: int, pool
+):
+    """test cut into batch_size batches, submitted by concurrency threads.
+
+    Submitter i sends every concurrency-th batch, one at a time, to runner.
+    Returns (pred, total time, histogram of batch latencies).
+    """
+    n = test.shape[0]
+    pred = np.full((n, k), -1, dtype=np.int64)
+    starts = range(0, n, batch_size)
+    latencies = np.empty(len(starts), dtype=np.int64)
+
+    def submit_f(i):
+        for j in range(i, len(starts), concurrency):
+            start = starts[j]
+            batch = test[start : start + batch_size]
+            found, batch_time = runner.query_batch(batch, k)
+            latencies[j] = batch_time * 1e9
+            pred[start : start + len(batch)] = found
+
+    start_time = time.perf_counter()
+    pool.map(submit_f, range(concurrency))
+    end_time = time.perf_counter()
+    total_time = end_time - start_time
+
+    hist = LatencyHistogram()
+    hist.record(latencies)
+    return pred, total_time, hist
+
+
+def save_bench_batch(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    points,
+    meta: dict | None,
+):
+    path = os.path.join(result_dir, f"{dataset}-batch.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "batch_size",
+        "concurrency",
+        "threads",
+        "holds_gil",
+        "batches",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "nb_runs",
+        "mean_batch_us",
+        *(column for _, column in LATENCY_PERCENTILES),
+        *usage.USAGE_COLUMNS,
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+
+    rows = []
+    for point in points:
+        rows.append(
+            [
+                runner_name,
+                tag,
+                point["batch_size"],
+                point["concurrency"],
+                point["threads"],
+                point["holds_gil"],
+                point["batches"],
+                point["recall"],
+                point["mean_qps"],
+                point["std_qps"],
+                BATCH_RUNS,
+                point["hist"].mean() / 1e3,
+                *latency_columns(point["hist"]),
+                *point["usage"],
+                point["start_time"],
+                point["end_time"],
+                *registry.build_stamp(meta),
+            ]
+        )
+
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], int(r[2]), int(r[3])),
+    )
+
+
+def runner_batch(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+    batch_sizes,
+    concurrencies,
+):
+    """Throughput and batch latency for every batch size x concurrency.
+
+    The submitters share one loaded runner, as the threads of every other
+    mode do, so the index is in memory once whatever the concurrency; annoy
+    on its thread_executor. The threads a runner is loaded with go to the
+    whole instance, its pool shared by the submitters, except with
+    THREADS_PER_CALL, where each call takes its own and the submitters get
+    an even share each. A runner that holds the GIL (holds_gil in the CSV)
+    searches one submitter at a time, whatever the concurrency.
+    """
+    k = neighbors.shape[1]
+    n = test.shape[0]
+
+    points = []
+    for concurrency in concurrencies:
+        runner, index_path, config, runner_name = create_f(
+            index_dir, dataset, thread_executor(dataset_config)
+        )
+        if getattr(runner, "THREADS_PER_CALL", False):
+            share = max(1, threads // concurrency)
+        else:
+            share = threads
+        runner.load_index(train, index_path, share, config)
+        gil = getattr(runner, "HOLDS_GIL", False)
+        pool = multiprocessing.pool.ThreadPool(concurrency)
+        # fault the index in first: whichever combination came first would
+        # pay for it
+        submit_batches(runner, test, k, n, concurrency, pool)
+
+        for batch_size in batch_sizes:
+            start_time = get_time()
+            qpss = []
+            hist = LatencyHistogram()
+            usage_before = usage.snapshot()
+            for _ in range(BATCH_RUNS):
+                pred_vecs, total_time, run_hist = submit_batches(
+                    runner, test, k, batch_size, concurrency, pool
+                )
+                qpss.append(n / total_time)
+                hist.merge(run_hist)
+            usage_after = usage.snapshot()
+            end_time = get_time()
+
+            point = {
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                "threads": share,
+                "holds_gil": gil,
+                "batches": -(-n // batch_size),
+                "recall": recall_per_query(pred_vecs, neighbors, k).mean(),
+                "mean_qps": np.mean(qpss),
+                "std_qps": np.std(qpss),
+                "hist": hist,
+                "usage": usage.delta(usage_before, usage_after),
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+            points.append(point)
+            print(
+                f"[{tag}] batch={batch_size} concurrency={concurrency} "
+                f"Recall@{k}: {point['recall']:.4f}  "
+                f"QPS: {point['mean_qps']:.2f} ± {point['std_qps']:.2f}  "
+                f"batch p50: {hist.percentile(50) / 1e3:.1f}us "
+                f"p99: {hist.percentile(99) / 1e3:.1f}us"
+            )
+
+        pool.close()
+        del runner
+
+    save_bench_batch(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        points,
+        registry.read(index_path),
+    )
+
+
+def save_bench_serve(
+    result_dir: str,
+    dataset: str,
+    tag: str,
+    runner_name: str,
+    points,
+    meta: dict | None,
+):
+    """<dataset>-serve.csv, a row per node, and <dataset>-serve-procs.csv,
+    a row per worker, for every process count served."""
+    path = os.path.join(result_dir, f"{dataset}-serve.csv")
+    header = [
+        "runner_name",
+        "tag",
+        "processes",
+        "pinned",
+        "node",
+        "workers",
+        "recall",
+        "mean_qps",
+        "std_qps",
+        "nb_runs",
+        "load_time",
+        "rss_anon_mb",
+        "rss_file_mb",
+        "rss_shmem_mb",
+        "page_cache_mb",
+        "start_time",
+        "end_time",
+        *registry.STAMP_COLUMNS,
+    ]
+    procs_path = os.path.join(result_dir, f"{dataset}-serve-procs.csv")
+    procs_header = [
+        "runner_name",
+        "tag",
+        "processes",
+        "pinned",
+        "worker",
+        "node",
+        "load_time",
+        "rss_anon_mb",
+        "rss_file_mb",
+        "rss_shmem_mb",
+        *usage.USAGE_COLUMNS,
+    ]
+
+    rows = []
+    procs_rows = []
+    for point in points:
+        common = [runner_name, tag, point["processes"], int(point["pinned"])]
+        for node, page_cache in point["page_cache"].items():
+            workers = [
+                rss
+                for worker_node, rss in zip(point["nodes"], point["rss"])
+                if worker_node == node
+            ]
+            # anon, file, shmem summed over the node's workers
+            rss = np.sum(workers, axis=0) if workers else [0, 0, 0]
+            rows.append(
+                [
+                    *common,
+                    node,
+                    len(workers),
+                    point["recall"],
+                    point["mean_qps"],
+                    point["std_qps"],
+                    SERVE_RUNS,
+                    point["load_time"],
+                    *rss,
+                    page_cache,
+                    point["start_time"],
+                    point["end_time"],
+                    *registry.build_stamp(meta),
+                ]
+            )
+        for i, (node, load_time, rss, worker_usage) in enumerate(
+            zip(
+                point["nodes"],
+                point["load_times"],
+                point["rss"],
+                point["usages"],
+            )
+        ):
+            procs_rows.append(
+                [*common, i, node, load_time, *rss, *worker_usage]
+            )
+
+    _upsert_rows(
+        path,
+        header,
+        rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], int(r[2]), int(r[4])),
+    )
+    _upsert_rows(
+        procs_path,
+        procs_header,
+        procs_rows,
+        runner_name,
+        tag,
+        lambda r: (r[0], r[1], int(r[2]), int(r[4])),
+    )
+
+
+def runner_serve(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    process_counts,
+    pin: bool,
+):
+    """The index served by each count of worker processes, all mapping the
+    same file: aggregate QPS, what every worker holds, and how much page
+    cache the serving took on each node."""
+    _, index_path, _, runner_name = create_f(index_dir, dataset, dataset_config)
+    k = neighbors.shape[1]
+    n = test.shape[0]
+
+    points = []
+    for processes in process_counts:
+        page_cache_before = node_file_pages_mb()
+        server = ServeProcesses(
+            create_f,
+            index_dir,
+            dataset,
+            dataset_config,
+            train,
+            processes,
+            pin,
+        )
+
+        start_time = get_time()
+        qpss = []
+        usages_before = server.usage()
+        for _ in range(SERVE_RUNS):
+            pred_vecs, total_time = server.query_batch(test, k)
+            qpss.append(n / total_time)
+        usages_after = server.usage()
+        end_time = get_time()
+
+        page_cache_after = node_file_pages_mb()
+        point = {
+            "processes": processes,
+            "pinned": pin,
+            "recall": recall_per_query(pred_vecs, neighbors, k).mean(),
+            "mean_qps": np.mean(qpss),
+            "std_qps": np.std(qpss),
+            "load_time": server.load_time,
+            "load_times": server.load_times,
+            "nodes": [server.node_of(i) for i in range(processes)],
+            "rss": server.rss(),
+            "usages": [
+                usage.delta(before, after)
+                for before, after in zip(usages_before, usages_after)
+            ],
+            "page_cache": {
+                node: page_cache_after[node] - page_cache_before.get(node, 0)
+                for node in page_cache_after
+            },
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        server.close()
+        points.append(point)
+
+        rss_anon, rss_file, _ = np.sum(point["rss"], axis=0)
+        print(
+            f"[{tag}] processes={processes} Recall@{k}: "
+            f"{point['recall']:.4f}  QPS: {point['mean_qps']:.2f} ± "
+            f"{point['std_qps']:.2f}  RSS anon {rss_anon:.0f}M file "
+            f"{rss_file:.0f}M  page cache "
+            + " ".join(
+                f"node{node}={mb:+.0f}M"
+                for node, mb in point["page_cache"].items()
+            )
+        )
+
+    save_bench_serve(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        points,
+        registry.read(index_path),
+    )
+
+
+def runner_scaling(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+):
+    """QPS at 1, 2, 4, ... threads up to threads, where a runner stops
+    scaling. Each count loads the index afresh, with that many threads."""
+    k = neighbors.shape[1]
+    n = test.shape[0]
+
+    points = []
+    for count in thread_counts(threads):
+        runner, index_path, config, runner_name = create_f(
+            index_dir, dataset, dataset_config
+        )
+        runner.load_index(train, index_path, count, config)
+        # the first count would pay for faulting the index in
+        runner.query_batch(test, k)
+
+        start_time = get_time()
+        qpss = []
+        for _ in range(SCALING_RUNS):
+            pred_vecs, total_time = runner.query_batch(test, k)
+            qpss.append(n / total_time)
+        end_time = get_time()
+
+        point = {
+            "threads": count,
+            "recall": recall_per_query(pred_vecs, neighbors, k).mean(),
+            "mean_qps": np.mean(qpss),
+            "std_qps": np.std(qpss),
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        points.append(point)
+        print(
+            f"[{tag}] threads={count} Recall@{k}: {point['recall']:.4f}  "
+            f"QPS: {point['mean_qps']:.2f} ± {point['std_qps']:.2f}  "
+            f"efficiency: "
+            f"{point['mean_qps'] / (points[0]['mean_qps'] * count):.2f}"
+        )
+        del runner  # an annoy process pool goes with it
+
+    save_bench_scaling(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        points,
+        registry.read(index_path),
+    )
+
+
+def runner_sweep(
+    create_f,
+    index_dir: str,
+    result_dir: str,
+    dataset: str,
+    dataset_config,
+    train: np.ndarray,
+    test: np.ndarray,
+    neighbors: np.ndarray,
+    tag: str,
+    threads: int,
+    target_recall: float,
+):
+    """Recall and QPS over a grid of search settings, on one loaded index.
+
+    Picks the fastest setting that still reaches target_recall, so runners
+    can be compared at equal recall rather than at their CONFIG point.
+    """
+    runner, index_path, config, runner_name = create_f(
+        index_dir, dataset, dataset_config
+    )
+    param = runner.SEARCH_PARAM
+    if param is None:
+        print(f"[{tag}] {runner_name} has no search setting, nothing to sweep")
+        return
+    runner.load_index(train, index_path, threads, config)
+    base = config[param]
+    k = neighbors.shape[1]
+    n = test.shape[0]
+
+    # fault the index in first: whichever setting came first would pay for it
+    runner.query_batch(test, k)
+
+    points = []
+    for value in sorted({max(1, round(base * f)) for f in SWEEP_FACTORS}):
+        value = runner.set_search(value, k)
+        if any(point["value"] == value for point in points):
+            continue
+
+        start_time = get_time()
+        qpss = []
+        for _ in range(SWEEP_RUNS):
+            pred_vecs, total_time = runner.query_batch(test, k)
+            qpss.append(n / total_time)
+        end_time = get_time()
+
+        point = {
+            "value": value,
+            "recall": recall_per_query(pred_vecs, neighbors, k).mean(),
+            "mean_qps": np.mean(qpss),
+            "std_qps": np.std(qpss),
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        points.append(point)
+        print(
+            f"[{tag}] {param}={value} Recall@{k}: {point['recall']:.4f}  "
+            f"QPS: {point['mean_qps']:.2f} ± {point['std_qps']:.2f}"
+        )
+
+    frontier = pareto(points)
+    reaching = [i for i in frontier if points[i]["recall"] >= target_recall]
+    picked = max(reaching, key=lambda i: points[i]["mean_qps"], default=None)
+
+    save_bench_sweep(
+        result_dir,
+        dataset,
+        tag,
+        runner_name,
+        param,
+        target_recall,
+        points,
+        frontier,
+        picked,
+        registry.read(index_path),
+    )
+
+    if picked is None:
+        print(f"[{tag}] no {param} reaches Recall@{k} {target_recall}")
+    else:
+        point = points[picked]
+        print(
+            f"[{tag}] picked {param}={point['value']} for Recall@{k} "
+            f">= {target_recall}: {point['recall']:.4f} at "
+            f"{point['mean_qps']:.2f} QPS"
+        )
+
+
+def run(
+    data_dir: str,
+    index_dir: str,
+    result_dir: str,
+    datasets,
+    faiss: bool,
+    annoy: bool,
+    usearch: bool,
+    bench: bool,
+    recreate_index: bool,
+    tag: str,
+    threads: int,
+    running_time: int,
+    *,
+    latency: bool = False,
+    annoy_executor: str = "thread",
+    shard: bool = False,
+    target_qps=None,
+    sweep: bool = False,
+    target_recall: float = 0.9,
+    mirror_dir: str | None = None,
+    dataset_url: str = DATASET_URL,
+    exact: bool = False,
+    faiss_families=("ivfflat",),
+    scaling: bool = False,
+    replica: bool = False,
+    batch_sizes=None,
+    concurrencies=None,
+    serve=None,
+    serve_pin: bool = False,
+    server_concurrencies=None,
+    write_rates=None,
+    advice: str = "none",
+    cold_start: bool = False,
+    cache_sizes=None,
+    zipf: float = ZIPF_S,
+    tenants: bool = False,
+    tenant_threads=None,
+    usearch_dtypes=(mod_usearch.DTYPE,),
+    require_pin: bool = False,
+):
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(index_dir, exist_ok=True)
+    os.makedirs(result_dir, exist_ok=True)
+
+    runners = {
+        name: create_f
+        for name, create_f, enabled in [
+            *(
+                (mod_faiss.config_key(family), faiss_creator(family), faiss)
+                for family in faiss_families
+            ),
+            ("annoy", create_annoy, annoy),
+            *(
+                (
+                    mod_usearch.runner_name(dtype),
+                    usearch_creator(dtype),
+                    usearch,
+                )
+                for dtype in usearch_dtypes
+            ),
+            ("exact", create_exact, exact),
+        ]
+        if enabled
+    }
+    # runner name -> usearch dtype, for the datasets a dtype cannot hold
+    dtypes = {mod_usearch.runner_name(dtype): dtype for dtype in usearch_dtypes}
+
+    def runners_for(names):
+        """The runners that hold every dataset of names."""
+        fitting = {}
+        for name, create_f in runners.items():
+            misfits = [
+                dataset
+                for dataset in names
+                if name in dtypes
+                and not mod_usearch.fits(dtypes[name], dataset)
+            ]
+            if misfits:
+                print(
+                    f"Skipping {name}: {dtypes[name]} cannot hold"
+                    f" {' '.join(misfits)}"
+                )
+                continue
+            fitting[name] = create_f
+        return fitting
+
+    if tenants:
+        tenant_threads = tenant_threads or [
+            max(1, threads // len(datasets))
+        ] * len(datasets)
+        if len(tenant_threads) != len(datasets):
+            raise ValueError(
+                f"{len(tenant_threads)} tenant thread budgets for "
+                f"{len(datasets)} datasets"
+            )
+    # (dataset, dataset_config, train, test, neighbors), with tenants
+    loaded = []
+
+    for dataset in datasets:
+        print(f"-- Dataset {dataset} --")
+        dataset_base, _ = os.path.splitext(dataset)
+        out_dir = arrays.array_dir(data_dir, dataset_base)
+        spec = synth.parse(dataset)
+        # converted once, then mapped: train is never read unless an index
+        # is built, test and neighbors are page cache, not anon
+        if not arrays.converted(out_dir):
+            if spec is not None:
+                synth.generate(spec, out_dir, threads)
+            else:
+                path = fetch_dataset(
+                    dataset, data_dir, mirror_dir, dataset_url, require_pin
+                )
+                arrays.convert(path, out_dir, threads)
+        train, test, neighbors = arrays.load(out_dir).values()
+        dataset_sha256 = arrays.digest(out_dir)
+
+        dataset_config = CONFIG.get(
+            dataset, synth.runner_config(spec) if spec else {}
+        )
+        dataset_config = {
+            **dataset_config,
+            "annoy": {
+                **dataset_config.get("annoy", {}),
+                "executor": annoy_executor,
+            },
+        }
+
+        dataset_runners = runners_for([dataset_base])
+        for create_f in dataset_runners.values():
+            runner_create_index(
+                create_f,
+                index_dir,
+                result_dir,
+                dataset_base,
+                dataset_config,
+                train,
+                dataset_sha256,
+                recreate_index,
+            )
+
+        if tenants:
+            loaded.append(
+                (dataset_base, dataset_config, train, test, neighbors)
+            )
+            continue
+
+        if bench:
+            # a cold start's caches were dropped before its process began
+            if not cold_start:
+                sync_drop_caches()
+            # the queries and the ground truth are not what is measured, keep
+            # their first read off the first run
+            arrays.touch(test, neighbors)
+
+            for name, create_f in dataset_runners.items():
+                print(f"== Benching {name.capitalize()} ==")
+                if cold_start:
+                    runner_cold(
+                        create_f,
+                        index_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors.shape[1],
+                        tag,
+                        threads,
+                        running_time or LOAD_SECS,
+                    )
+                    continue
+                if cache_sizes:
+                    runner_cache(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors,
+                        tag,
+                        threads,
+                        shard,
+                        replica,
+                        cache_sizes,
+                        zipf,
+                    )
+                    continue
+                if target_qps:
+                    runner_load(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors.shape[1],
+                        tag,
+                        threads,
+                        running_time or LOAD_SECS,
+                        target_qps,
+                    )
+                    continue
+                if write_rates:
+                    runner_write(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors,
+                        tag,
+                        threads,
+                        running_time or LOAD_SECS,
+                        write_rates,
+                    )
+                    continue
+                if server_concurrencies:
+                    runner_server(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors,
+                        tag,
+                        threads,
+                        running_time or LOAD_SECS,
+                        server_concurrencies,
+                    )
+                    continue
+                if serve:
+                    runner_serve(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors,
+                        tag,
+                        serve,
+                        serve_pin,
+                    )
+                    continue
+                if batch_sizes or concurrencies:
+                    runner_batch(
+                        create_f,
+                        index_dir,
+                        result_dir,
+                        dataset_base,
+                        dataset_config,
+                        train,
+                        test,
+                        neighbors,
+                        tag,
                         threads,
-                        running_time,
+                        batch_sizes or [test.shape[0]],
+                        concurrencies or [1],
                     )
-                if annoy:
-                    print("== Benching Annoy ==")
-                    runner_bench(
-                        create_annoy,
+                    continue
+                if scaling:
+                    runner_scaling(
+                        create_f,
                         index_dir,
                         result_dir,
                         dataset_base,
@@ -437,12 +2634,11 @@ def run(
                         neighbors,
                         tag,
                         threads,
-                        running_time,
                     )
-                if usearch:
-                    print("== Benching Usearch ==")
-                    runner_bench(
-                        create_usearch,
+                    continue
+                if sweep:
+                    runner_sweep(
+                        create_f,
                         index_dir,
                         result_dir,
                         dataset_base,
@@ -452,5 +2648,43 @@ def run(
                         neighbors,
                         tag,
                         threads,
-                        running_time,
+                        target_recall,
                     )
+                    continue
+                runner_bench(
+                    create_f,
+                    index_dir,
+                    result_dir,
+                    dataset_base,
+                    dataset_config,
+                    train,
+                    test,
+                    neighbors,
+                    tag,
+                    threads,
+                    running_time,
+                    latency,
+                    shard,
+                    replica,
+                    advice,
+                )
+
+    if bench and tenants:
+        print(f"-- Tenants {' '.join(datasets)} --")
+        sync_drop_caches()
+        for _, _, _, test, neighbors in loaded:
+            arrays.touch(test, neighbors)
+
+        tenant_runners = runners_for([dataset for dataset, *_ in loaded])
+        for name, create_f in tenant_runners.items():
+            print(f"== Benching {name.capitalize()} ==")
+            runner_tenants(
+                create_f,
+                index_dir,
+                result_dir,
+                loaded,
+                tag,
+                tenant_threads,
+                replica,
+                running_time or LOAD_SECS,
+            )
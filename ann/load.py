@@ -0,0 +1,75 @@
+import queue
+import threading
+import time
+import numpy as np
+from .histogram import LatencyHistogram
+
+# seconds per offered load point when --running-time does not say
+LOAD_SECS = 30
+
+
+def open_loop(
+    runner,
+    test: np.ndarray,
+    k: int,
+    threads: int,
+    target_qps: float,
+    duration: float,
+    seed: int = 0,
+):
+    """Offer target_qps single queries per second for duration seconds.
+
+    Arrivals are a Poisson process laid out up front, a generator thread
+    releases each one at its time and never waits for an answer, so a slow
+    query delays the ones behind it instead of the arrivals themselves. The
+    response time runs from the scheduled arrival, not from the dequeue:
+    queueing counts, and so does a generator running late.
+    """
+    rng = np.random.default_rng(seed)
+    nb_queries = max(int(target_qps * duration), 1)
+    arrivals = np.cumsum(rng.exponential(1e9 / target_qps, nb_queries))
+    arrivals = arrivals.astype(np.int64)
+    n = test.shape[0]
+
+    pending = queue.SimpleQueue()
+    service = np.empty(nb_queries, dtype=np.int64)
+    response = np.empty(nb_queries, dtype=np.int64)
+    finished = np.empty(nb_queries, dtype=np.int64)
+
+    def worker():
+        while (j := pending.get()) is not None:
+            begin = time.perf_counter_ns()
+            runner.query(test[j % n], k)
+            end = time.perf_counter_ns()
+            service[j] = end - begin
+            response[j] = end - start_ns - arrivals[j]
+            finished[j] = end - start_ns
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+
+    start_ns = time.perf_counter_ns()
+    for j, arrival in enumerate(arrivals):
+        wait = arrival - (time.perf_counter_ns() - start_ns)
+        if wait > 0:
+            time.sleep(wait / 1e9)
+        pending.put(j)
+    issued_ns = time.perf_counter_ns() - start_ns
+
+    for _ in workers:
+        pending.put(None)
+    for w in workers:
+        w.join()
+
+    response_hist = LatencyHistogram()
+    response_hist.record(response)
+    service_hist = LatencyHistogram()
+    service_hist.record(service)
+    return {
+        "queries": nb_queries,
+        "offered_qps": nb_queries / (issued_ns / 1e9),
+        "achieved_qps": nb_queries / (finished.max() / 1e9),
+        "response": response_hist,
+        "service": service_hist,
+    }
@@ -1,61 +1,244 @@
-import h5py
+import importlib.metadata
+import os
+import shutil
+import multiprocessing
 import multiprocessing.pool
 import time
+import weakref
 import numpy as np
 from annoy import AnnoyIndex
+from .segments import attach_segment, create_segment
+from .build import iter_chunks
+
+EXECUTORS = ["thread", "process"]
+
+# where load_replica copies the index: tmpfs, so the copy is memory placed
+# by the copying thread and not the shared page cache of the .ann file
+REPLICA_DIR = "/dev/shm"
+
+# queries per task handed to a process worker: big enough that the queue
+# round trip vanishes, small enough that the workers finish together
+CHUNK = 64
+
+
+def _annoy_index(dims: int, path: str):
+    if "angular" in path:
+        index = AnnoyIndex(dims, "angular")
+    elif "euclidean" in path:
+        index = AnnoyIndex(dims, "euclidean")
+    else:
+        raise ValueError("Unsupported format")
+    return index
+
+
+def _process_worker(index_path: str, dims: int, tasks, done):
+    """Loop of a process executor worker, on its own GIL.
+
+    Its load() maps the same .ann file as every other worker, so they all
+    share the page cache copy. A task is a slice of the query segment, the
+    neighbours are written straight into the result segment.
+    """
+    index = _annoy_index(dims, index_path)
+    index.load(index_path)
+
+    names, segments = None, ()
+    while (task := tasks.get()) is not None:
+        queries_name, results_name, n, k, search_k, start, end = task
+        # a new batch shape means new segments, drop the previous ones
+        if names != (queries_name, results_name):
+            for shm, _ in segments:
+                shm.close()
+            names = (queries_name, results_name)
+            segments = (
+                attach_segment(queries_name, (n, dims), np.float32),
+                attach_segment(results_name, (n, k), np.int64),
+            )
+        (_, queries), (_, results) = segments
+
+        for i in range(start, end):
+            found = index.get_nns_by_vector(queries[i], k, search_k=search_k)
+            results[i, : len(found)] = found
+        done.put(end - start)
+
+    for shm, _ in segments:
+        shm.close()
+
+
+def _shutdown(procs, tasks, segments):
+    for _ in procs:
+        tasks.put(None)
+    for proc in procs:
+        proc.join()
+    for shm in segments:
+        shm.close()
+        shm.unlink()
 
 
 class Annoy:
-    def _annoy_index(self, dims: int, path: str):
-        if "angular" in path:
-            index = AnnoyIndex(dims, "angular")
-        elif "euclidean" in path:
-            index = AnnoyIndex(dims, "euclidean")
-        else:
-            raise ValueError("Unsupported format")
-        return index
+    SEARCH_PARAM = "search_k"
+
+    def version(self) -> str:
+        # annoy has no __version__
+        return importlib.metadata.version("annoy")
+
+    def build_params(self, config) -> dict:
+        return {"trees": config["trees"]}
 
-    def create_index(self, train: h5py.Dataset, index_path: str, config):
+    def create_index(self, train: np.ndarray, index_path: str, config):
         _, dims = train.shape
         trees = config["trees"]
 
         print(f"Creating index {index_path}, dims={dims}, trees={trees}")
 
-        index = self._annoy_index(dims, index_path)
-        for i, vec in enumerate(train):
-            index.add_item(i, vec.tolist())
+        index = _annoy_index(dims, index_path)
+        # annoy has no bulk add, but the rows at least come from memory
+        # instead of one dataset read each
+        for start, chunk in iter_chunks(train):
+            for i, vec in enumerate(chunk.tolist(), start):
+                index.add_item(i, vec)
         index.build(trees, n_jobs=-1)  # the default is not all cores here
         index.save(index_path)
 
         print(f"Index created {index_path}")
 
     def load_index(
-        self, train: h5py.Dataset, index_path: str, threads: int, config
+        self, train: np.ndarray, index_path: str, threads: int, config
     ):
         _, dims = train.shape
         search_k = config["search_k"]
+        executor = config.get("executor", "thread")
 
-        index = self._annoy_index(dims, index_path)
+        index = _annoy_index(dims, index_path)
         index.load(index_path)
 
         self._index = index
-        self._pool = multiprocessing.pool.ThreadPool(threads)
         self._search_k = search_k
+        self._dims = dims
+        if executor == "process":
+            self._start_processes(index_path, threads)
+        else:
+            self._pool = multiprocessing.pool.ThreadPool(threads)
 
         print(
-            f"Index loaded {index_path}, dims={dims}, search_k={search_k}, threads={threads}"
+            f"Index loaded {index_path}, dims={dims}, search_k={search_k}, threads={threads}, executor={executor}"
+        )
+
+    def load_replica(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
+        """A private copy of the index, on the node of the calling thread.
+
+        annoy only loads by mmap, so the copy is a tmpfs file written by
+        this thread, which first touch puts on its node, and mapped. It is
+        unlinked at once: the mapping keeps it alive, and nothing else can.
+        Serves query only: the node's threads are the caller's.
+        """
+        _, dims = train.shape
+        copy_path = os.path.join(
+            REPLICA_DIR,
+            f"{os.path.basename(index_path)}.{os.getpid()}.{id(self)}",
         )
+        shutil.copyfile(index_path, copy_path)
+
+        index = _annoy_index(dims, index_path)
+        # prefaulted, so the copy is resident in the footprint of the load
+        index.load(copy_path, prefault=True)
+        os.unlink(copy_path)
+
+        self._index = index
+        self._search_k = config["search_k"]
+        self._dims = dims
+
+    def _start_processes(self, index_path: str, threads: int):
+        # fork: spawn would re-run run_ann.py, which has no main guard
+        ctx = multiprocessing.get_context("fork")
+        self._tasks = ctx.SimpleQueue()
+        self._done = ctx.SimpleQueue()
+        self._procs = [
+            ctx.Process(
+                target=_process_worker,
+                args=(
+                    index_path,
+                    self._dims,
+                    self._tasks,
+                    self._done,
+                ),
+                daemon=True,
+            )
+            for _ in range(threads)
+        ]
+        for proc in self._procs:
+            proc.start()
+
+        # (n, k) -> (queries, results), segments lives for the finalizer
+        self._buffers = {}
+        self._segments = []
+        weakref.finalize(
+            self, _shutdown, self._procs, self._tasks, self._segments
+        )
+
+    def _segment(self, shape, dtype):
+        shm, array = create_segment(shape, dtype)
+        self._segments.append(shm)
+        return shm, array
+
+    def _query_batch_processes(self, test: np.ndarray, k: int):
+        n = test.shape[0]
+        if (n, k) not in self._buffers:
+            self._buffers[(n, k)] = (
+                self._segment((n, self._dims), np.float32),
+                self._segment((n, k), np.int64),
+            )
+        (queries_shm, queries), (results_shm, results) = self._buffers[(n, k)]
+        queries[:] = test
+        results.fill(-1)
+        chunks = [
+            (
+                queries_shm.name,
+                results_shm.name,
+                n,
+                k,
+                self._search_k,
+                start,
+                min(start + CHUNK, n),
+            )
+            for start in range(0, n, CHUNK)
+        ]
+
+        start_time = time.perf_counter()
+        for chunk in chunks:
+            self._tasks.put(chunk)
+        for _ in chunks:
+            self._done.get()
+        end_time = time.perf_counter()
+        total_time = end_time - start_time
+
+        # the segment is reused by the next batch, hand out a copy
+        return results.copy(), total_time
+
+    def set_search(self, search_k: int, k: int = 1) -> int:
+        self._search_k = search_k
+        return search_k
+
+    def query(self, query: np.ndarray, k: int):
+        return self._index.get_nns_by_vector(query, k, search_k=self._search_k)
+
+    def query_batch(self, test: np.ndarray, k: int):
+        if hasattr(self, "_procs"):
+            return self._query_batch_processes(test, k)
+
+        # -1 pads the rows annoy could not fill with k neighbours
+        pred = np.full((test.shape[0], k), -1, dtype=np.int64)
 
-    def query_batch(self, test: h5py.Dataset, k: int):
         def query_f(i_query):
-            _, query = i_query
-            pred = self._index.get_nns_by_vector(
+            i, query = i_query
+            found = self._index.get_nns_by_vector(
                 query, k, search_k=self._search_k
             )
-            return pred
+            pred[i, : len(found)] = found
 
         start_time = time.perf_counter()
-        pred = self._pool.map(query_f, enumerate(test))
+        self._pool.map(query_f, enumerate(test))
         end_time = time.perf_counter()
         total_time = end_time - start_time
         return pred, total_time
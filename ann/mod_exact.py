@@ -0,0 +1,213 @@
+import time
+import numpy as np
+from .shard import pinned_pool
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # then numpy's BLAS runs its own threads under ours
+    threadpool_limits = None
+
+# base rows scored per matmul, and at most this many queries per task: a
+# task's score block is at most QUERY_BLOCK x BASE_BLOCK floats, 32M
+BASE_BLOCK = 8_192
+QUERY_BLOCK = 1_024
+
+
+def _metric(path: str) -> str:
+    if "angular" in path:
+        return "angular"
+    elif "euclidean" in path:
+        return "euclidean"
+    raise ValueError("Unsupported format")
+
+
+def row_terms(base: np.ndarray, metric: str) -> np.ndarray:
+    """The per base row factor of the score, one streaming pass over base.
+
+    euclidean: |x|^2, the score is |x|^2 - 2 q.x (|q|^2 ranks nothing)
+    angular: 1 / |x|, the score is -(q.x) / |x| (|q| ranks nothing)
+    """
+    terms = np.empty(base.shape[0], dtype=np.float32)
+    for start in range(0, base.shape[0], BASE_BLOCK):
+        block = np.asarray(base[start : start + BASE_BLOCK], dtype=np.float32)
+        sq = np.einsum("ij,ij->i", block, block)
+        if metric == "euclidean":
+            terms[start : start + len(block)] = sq
+        else:
+            norms = np.sqrt(sq)
+            norms[norms == 0] = 1
+            terms[start : start + len(block)] = 1 / norms
+    return terms
+
+
+def knn(
+    base: np.ndarray,
+    terms: np.ndarray,
+    metric: str,
+    queries: np.ndarray,
+    k: int,
+):
+    """Exact k nearest base rows of every query, best first.
+
+    base is scanned BASE_BLOCK rows at a time, each block scored with one
+    matmul, and only its k best per query are merged into the running top k:
+    partial sorts all the way, a full sort only of the final k.
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    nq = queries.shape[0]
+    best_scores = np.full((nq, k), np.inf, dtype=np.float32)
+    best_ids = np.full((nq, k), -1, dtype=np.int64)
+
+    for start in range(0, base.shape[0], BASE_BLOCK):
+        block = np.asarray(base[start : start + BASE_BLOCK], dtype=np.float32)
+        dots = queries @ block.T
+        if metric == "euclidean":
+            scores = terms[start : start + len(block)] - 2 * dots
+        else:
+            scores = -dots * terms[start : start + len(block)]
+
+        if scores.shape[1] > k:
+            top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        scores = np.concatenate(
+            [best_scores, np.take_along_axis(scores, top, axis=1)], axis=1
+        )
+        ids = np.concatenate([best_ids, top + start], axis=1)
+        keep = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_ids = np.take_along_axis(ids, keep, axis=1)
+
+    order = np.argsort(best_scores, axis=1)
+    return (
+        np.take_along_axis(best_ids, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+def _search(
+    pool, threads: int, base, terms, metric, queries: np.ndarray, k: int
+):
+    """knn over the pool, BLAS single threaded.
+
+    At least one task per thread: each task streams the whole base, so every
+    thread is reading memory all the time.
+    """
+    n = queries.shape[0]
+    ids = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    step = max(1, min(QUERY_BLOCK, -(-n // threads)))
+
+    def search_f(start):
+        end = start + step
+        ids[start:end], scores[start:end] = knn(
+            base, terms, metric, queries[start:end], k
+        )
+
+    if threadpool_limits is None:
+        pool.map(search_f, range(0, n, step))
+    else:
+        with threadpool_limits(1, user_api="blas"):
+            pool.map(search_f, range(0, n, step))
+    return ids, scores
+
+
+def ground_truth(
+    train: np.ndarray,
+    test: np.ndarray,
+    k: int,
+    metric: str,
+    threads: int,
+):
+    """(neighbors, distances) of test in train, ann-benchmarks' layout.
+
+    Distances are euclidean, or cosine distance (1 - cos) for angular.
+    """
+    terms = row_terms(train, metric)
+    pool = pinned_pool(threads)
+    ids, scores = _search(pool, threads, train, terms, metric, test, k)
+    pool.close()
+
+    if metric == "euclidean":
+        q_sq = np.einsum("ij,ij->i", test, test)[:, None]
+        distances = np.sqrt(np.maximum(scores + q_sq, 0))
+    else:
+        q_norms = np.linalg.norm(test, axis=1)[:, None]
+        q_norms[q_norms == 0] = 1
+        distances = 1 + scores / q_norms
+    return ids.astype(np.int32), distances.astype(np.float32)
+
+
+class Exact:
+    """Brute force: every query scores every train vector.
+
+    There is no index, the mapped train.npy is searched directly, so this is
+    a pure streaming bandwidth workload, the upper bound of what replication
+    can win on ANN. What gets built is the per row score term.
+    """
+
+    SEARCH_PARAM = None
+    # what is mapped and read per query is train, not the index file
+    SEARCHES_TRAIN = True
+
+    def version(self) -> str:
+        return np.__version__
+
+    def build_params(self, _) -> dict:
+        return {"base_block": BASE_BLOCK}
+
+    def create_index(self, train: np.ndarray, index_path: str, _):
+        nvecs, dims = train.shape
+        metric = _metric(index_path)
+
+        print(f"Creating index {index_path}, dims={dims}, metric={metric}")
+
+        # np.save appends .npy to a name without it, write through a handle
+        with open(index_path, "wb") as f:
+            np.save(f, row_terms(train, metric))
+
+        print(f"Index created {index_path}")
+
+    def load_index(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
+        _, dims = train.shape
+
+        self._base = train
+        self._terms = np.load(index_path)
+        self._metric = _metric(index_path)
+        self._pool = pinned_pool(threads)
+        self._threads = threads
+
+        print(
+            f"Index loaded {index_path}, dims={dims}, metric={self._metric}, threads={threads}"
+        )
+
+    def load_replica(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
+        """A private heap copy of train, on the node of the calling thread,
+        which does the copying and so touches it first. Serves query only:
+        the node's threads are the caller's."""
+        self._base = np.array(train)
+        self._terms = np.load(index_path)
+        self._metric = _metric(index_path)
+
+    def query(self, query: np.ndarray, k: int):
+        ids, _ = knn(self._base, self._terms, self._metric, query[None], k)
+        return ids[0]
+
+    def query_batch(self, test: np.ndarray, k: int):
+        start_time = time.perf_counter()
+        pred, _ = _search(
+            self._pool,
+            self._threads,
+            self._base,
+            self._terms,
+            self._metric,
+            test,
+            k,
+        )
+        end_time = time.perf_counter()
+        total_time = end_time - start_time
+        return pred, total_time
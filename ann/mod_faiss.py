@@ -1,50 +1,171 @@
-import h5py
 import numpy as np
-import sklearn
 import time
 import faiss
+from .build import FAISS_TRAIN_PER_LIST, iter_chunks, normalize_rows, sample
+
+# index families, each with its own CONFIG entry: "faiss" for ivfflat, the
+# first and the one the older results are, "faiss-<family>" for the others
+FAMILIES = ["ivfflat", "ivfpq", "ivfsq8", "hnsw"]
+
+# the IVF families map their inverted lists; HNSW has none, its vectors are
+# flat codes, which faiss maps since IO_FLAG_MMAP_IFC (the graph is read in)
+MMAP_FLAGS = {
+    "ivfflat": faiss.IO_FLAG_MMAP,
+    "ivfpq": faiss.IO_FLAG_MMAP,
+    "ivfsq8": faiss.IO_FLAG_MMAP,
+    "hnsw": getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP),
+}
+
+
+def config_key(family: str) -> str:
+    return "faiss" if family == "ivfflat" else f"faiss-{family}"
 
 
 class Faiss:
-    def create_index(self, train: h5py.Dataset, index_path: str, config):
-        _, dims = train.shape
-        nlist = config["nlist"]
+    # an add reallocates the inverted lists under a running search
+    ADD_WHILE_SEARCHING = False
+    # every query_batch runs on threads omp threads of its own
+    THREADS_PER_CALL = True
 
-        print(f"Creating index {index_path}, dims={dims}, nlist={nlist}")
+    def __init__(self, family: str = "ivfflat"):
+        self.family = family
+        self.SEARCH_PARAM = "ef_search" if family == "hnsw" else "nprobe"
 
-        if "angular" in index_path:
-            train = sklearn.preprocessing.normalize(train, axis=1, norm="l2")
+    def version(self) -> str:
+        return faiss.__version__
 
-        if train.dtype != np.float32:
-            train = train.astype(np.float32)  # type: ignore
+    def build_params(self, config) -> dict:
+        if self.family == "ivfflat":
+            # as before the families, so the existing indices stay current
+            return {"nlist": config["nlist"]}
+        elif self.family == "ivfpq":
+            keys = ["nlist", "m", "nbits"]
+        elif self.family == "ivfsq8":
+            keys = ["nlist"]
+        else:
+            keys = ["M", "ef_construction"]
+        return {"family": self.family, **{key: config[key] for key in keys}}
 
+    def _new_index(self, dims: int, config):
+        """(index, training rows it wants, 0 if it trains on nothing)"""
+        if self.family == "hnsw":
+            index = faiss.IndexHNSWFlat(dims, config["M"])
+            index.hnsw.efConstruction = config["ef_construction"]
+            return index, 0
+
+        nlist = config["nlist"]
         quantizer = faiss.IndexFlatL2(dims)
-        index = faiss.IndexIVFFlat(quantizer, dims, nlist, faiss.METRIC_L2)
-        index.train(train)  # type: ignore
-        index.add(train)  # type: ignore
+        train_size = nlist * FAISS_TRAIN_PER_LIST
+        if self.family == "ivfflat":
+            index = faiss.IndexIVFFlat(quantizer, dims, nlist, faiss.METRIC_L2)
+        elif self.family == "ivfpq":
+            nbits = config["nbits"]
+            index = faiss.IndexIVFPQ(quantizer, dims, nlist, config["m"], nbits)
+            # the sub-quantizers train k-means too, 2^nbits centroids each
+            train_size = max(train_size, 2**nbits * FAISS_TRAIN_PER_LIST)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer,
+                dims,
+                nlist,
+                faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_L2,
+            )
+        return index, train_size
+
+    def create_index(self, train: np.ndarray, index_path: str, config):
+        _, dims = train.shape
+        params = " ".join(
+            f"{key}={value}"
+            for key, value in self.build_params(config).items()
+            if key != "family"
+        )
+
+        print(
+            f"Creating index {index_path}, dims={dims}, "
+            f"family={self.family}, {params}"
+        )
+
+        # l2 on unit vectors ranks as cosine does
+        normalize = "angular" in index_path
+
+        index, train_size = self._new_index(dims, config)
+        if train_size:
+            index.train(sample(train, train_size, normalize))
+        for _, chunk in iter_chunks(train, normalize):
+            index.add(chunk)
         faiss.write_index(index, index_path)
 
         print(f"Index created {index_path}")
 
     def load_index(
-        self, train: h5py.Dataset, index_path: str, threads: int, config
+        self, train: np.ndarray, index_path: str, threads: int, config
     ):
         _, dims = train.shape
-        nprobe = config["nprobe"]
+        value = config[self.SEARCH_PARAM]
 
-        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+        index = faiss.read_index(index_path, MMAP_FLAGS[self.family])
         faiss.omp_set_num_threads(threads)
-        index.nprobe = nprobe
 
         self._index = index
+        self._threads = threads
+        self.set_search(value)
 
         print(
-            f"Index loaded {index_path}, dims={dims}, nprobe={nprobe}, threads={threads}"
+            f"Index loaded {index_path}, dims={dims}, family={self.family}, "
+            f"{self.SEARCH_PARAM}={value}, threads={threads}"
         )
 
-    def query_batch(self, test: h5py.Dataset, k: int):
+    def load_replica(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
+        """A private heap copy of the index, on the node of the calling
+        thread: read_index without a flag reads it into memory this thread
+        allocates and touches first."""
+        self._index = faiss.read_index(index_path)
+        faiss.omp_set_num_threads(threads)
+        self._threads = threads
+        self._normalize = "angular" in index_path
+        self.set_search(config[self.SEARCH_PARAM])
+
+    def add(self, start: int, vectors: np.ndarray):
+        """Append vectors to a loaded replica, a mapped index is read only.
+        faiss numbers them from ntotal on, which start must be."""
+        if self._index.ntotal != start:
+            raise ValueError(f"faiss adds at {self._index.ntotal}, not {start}")
+        # the writer is one thread, so is its assignment to the lists
+        faiss.omp_set_num_threads(1)
+        self._index.add(normalize_rows(vectors) if self._normalize else vectors)
+
+    def save(self, path: str):
+        faiss.write_index(self._index, path)
+
+    def set_search(self, value: int, k: int = 1) -> int:
+        if self.family == "hnsw":
+            # like usearch, faiss never searches fewer than k deep
+            self._index.hnsw.efSearch = value
+            return max(self._index.hnsw.efSearch, k)
+        # past nlist faiss probes every list anyway, report what it does
+        self._index.nprobe = min(value, self._index.nlist)
+        return self._index.nprobe
+
+    def query(self, query: np.ndarray, k: int):
+        # a single query never opens an omp region, the caller's threads are
+        # the parallelism
+        _, I = self._index.search(query[None], k)
+        return I[0]
+
+    def query_batch(self, test: np.ndarray, k: int):
+        # faiss fills these in place, nothing is converted afterwards
+        n = test.shape[0]
+        D = np.empty((n, k), dtype=np.float32)
+        I = np.empty((n, k), dtype=np.int64)
+
+        # the omp thread count belongs to the calling thread, which is not
+        # the loading one when batches are submitted concurrently
+        faiss.omp_set_num_threads(self._threads)
         start_time = time.perf_counter()
-        _, I = self._index.search(test, k)
+        self._index.search(test, k, D=D, I=I)
         end_time = time.perf_counter()
         total_time = end_time - start_time
-        return I.tolist(), total_time
+        return I, total_time
@@ -1,19 +1,62 @@
-import h5py
+import os
 import numpy as np
 import time
+import usearch
 from usearch.index import Index
+from .build import iter_chunks
+
+# what the vectors are stored as: the index's size, and so what a replica
+# costs, is 4, 2, 2 or 1 bytes per dimension. i8 scales components in
+# [-1, 1], which the angular datasets are once usearch normalizes them, and
+# the euclidean ones are not: see fits
+DTYPES = ["f32", "f16", "bf16", "i8"]
+DTYPE = "bf16"
+
+
+def fits(dtype: str, dataset: str) -> bool:
+    """Whether dtype holds dataset's vectors: i8 only the angular ones."""
+    return dtype != "i8" or "angular" in dataset
+
+
+def runner_name(dtype: str) -> str:
+    # the default keeps the plain name, its index and results predate the
+    # choice
+    return "usearch" if dtype == DTYPE else f"usearch-{dtype}"
 
 
 class Usearch:
+    SEARCH_PARAM = "e_search"
+    # an add may reserve, so reallocate, the graph under a running search;
+    # and a search keeps the GIL, so an add could only land between passes
+    # anyway: the adds go between READ_CHUNK read chunks, as faiss' do
+    ADD_WHILE_SEARCHING = False
+    # search keeps the GIL for the whole call, a batch or a single query:
+    # its own threads=n run in parallel, Python threads calling it do not
+    HOLDS_GIL = True
+    # every search is given threads threads of its own
+    THREADS_PER_CALL = True
+
+    def __init__(self, dtype: str = DTYPE):
+        self.dtype = dtype
+
+    def version(self) -> str:
+        return usearch.__version__
+
+    def build_params(self, _) -> dict:
+        return {"dtype": self.dtype}
+
     def _usearch_index(self, dims: int, path: str, e_search: int | None = None):
         if "angular" in path:
             index = Index(
-                ndim=dims, dtype="bf16", metric="cos", expansion_search=e_search
+                ndim=dims,
+                dtype=self.dtype,
+                metric="cos",
+                expansion_search=e_search,
             )
         elif "euclidean" in path:
             index = Index(
                 ndim=dims,
-                dtype="bf16",
+                dtype=self.dtype,
                 metric="l2sq",
                 expansion_search=e_search,
             )
@@ -21,19 +64,21 @@ class Usearch:
             raise ValueError("Unsupported format")
         return index
 
-    def create_index(self, train: h5py.Dataset, index_path: str, _):
-        nvecs, dims = train.shape
+    def create_index(self, train: np.ndarray, index_path: str, _):
+        _, dims = train.shape
 
-        print(f"Creating index {index_path}, dims={dims}")
+        print(f"Creating index {index_path}, dims={dims}, dtype={self.dtype}")
 
         index = self._usearch_index(dims, index_path)
-        keys = np.arange(nvecs)
-        index.add(keys, train)
+        for start, chunk in iter_chunks(train):
+            index.add(np.arange(start, start + len(chunk)), chunk)
         index.save(index_path)
 
         print(f"Index created {index_path}")
 
-    def load_index(self, train: h5py.Dataset, index_path: str, _: int, config):
+    def load_index(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
         _, dims = train.shape
         e_search = config["e_search"]
 
@@ -41,12 +86,60 @@ class Usearch:
         index.view(index_path)
 
         self._index = index
+        # usearch refuses more threads than the machine has cores
+        self._threads = min(threads, os.cpu_count())
+
+        print(
+            f"Index loaded {index_path}, dims={dims}, dtype={self.dtype}, e_search={e_search}, threads={threads}"
+        )
+
+    def load_replica(
+        self, train: np.ndarray, index_path: str, threads: int, config
+    ):
+        """A private heap copy of the index, on the node of the calling
+        thread: load() reads what view() would map."""
+        _, dims = train.shape
+        index = self._usearch_index(
+            dims, index_path, e_search=config["e_search"]
+        )
+        index.load(index_path)
+
+        self._index = index
+        self._threads = min(threads, os.cpu_count())
 
-        print(f"Index loaded {index_path}, dims={dims}, e_search={e_search}")
+    def add(self, start: int, vectors: np.ndarray):
+        """Insert vectors as keys start on, into a loaded replica: a viewed
+        index is read only."""
+        keys = np.arange(start, start + len(vectors))
+        self._index.add(keys, vectors, threads=1)
 
-    def query_batch(self, test: h5py.Dataset, k: int):
+    def save(self, path: str):
+        self._index.save(path)
+
+    def set_search(self, e_search: int, k: int = 1) -> int:
+        self._index.expansion_search = e_search
+        # usearch never expands fewer than the k it is asked for, report
+        # what it does
+        return max(e_search, k)
+
+    def query(self, query: np.ndarray, k: int):
+        # a single vector comes back already cut to what was found
+        return self._index.search(query, k, threads=1).keys
+
+    def query_batch(self, test: np.ndarray, k: int):
         start_time = time.perf_counter()
-        matches = self._index.search(test, k, threads=0)
+        matches = self._index.search(test, k, threads=self._threads)
         end_time = time.perf_counter()
         total_time = end_time - start_time
-        return matches.keys, total_time
+
+        if test.shape[0] == 1:
+            # a batch of one comes back as a single query's matches
+            pred = np.full((1, k), -1, dtype=np.int64)
+            pred[0, : len(matches.keys)] = matches.keys
+            return pred, total_time
+
+        # same bits, signed: the key space is nowhere near 2^63. Past a
+        # query's count usearch leaves garbage, make it the -1 padding
+        pred = matches.keys.view(np.int64)
+        pred[np.arange(k) >= matches.counts[:, None]] = -1
+        return pred, total_time
@@ -0,0 +1,58 @@
+import json
+import os
+
+# what results are stamped with, in the order of build_stamp
+STAMP_COLUMNS = ["library_version", "build_params", "dataset_sha256"]
+
+
+def meta_path(index_path: str) -> str:
+    return f"{index_path}.json"
+
+
+def expected(runner, dataset_sha256: str, config) -> dict:
+    """What an index built now, from this dataset and config, would record."""
+    return {
+        "runner": type(runner).__name__.lower(),
+        "library_version": runner.version(),
+        "build_params": runner.build_params(config),
+        "dataset_sha256": dataset_sha256,
+    }
+
+
+def read(index_path: str) -> dict | None:
+    try:
+        with open(meta_path(index_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write(index_path: str, meta: dict):
+    part = f"{meta_path(index_path)}.part"
+    with open(part, "w") as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+    os.replace(part, meta_path(index_path))
+
+
+def stale(index_path: str, meta: dict) -> str | None:
+    """Why the index at index_path cannot stand for meta, None if it can."""
+    if not os.path.exists(index_path):
+        return "no index"
+    recorded = read(index_path)
+    if recorded is None:
+        return "no build metadata"
+    for key, value in meta.items():
+        if recorded.get(key) != value:
+            return f"{key} {recorded.get(key)} != {value}"
+    return None
+
+
+def build_stamp(meta: dict | None) -> list:
+    if meta is None:
+        return [""] * len(STAMP_COLUMNS)
+    params = meta.get("build_params", {})
+    return [
+        meta.get("library_version", ""),
+        " ".join(f"{k}={v}" for k, v in sorted(params.items())),
+        meta.get("dataset_sha256", ""),
+    ]
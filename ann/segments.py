@@ -0,0 +1,15 @@
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+
+def create_segment(shape, dtype):
+    """A new shared memory segment holding a shape array, and the array."""
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    shm = SharedMemory(create=True, size=size)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def attach_segment(name: str, shape, dtype):
+    # the creator owns the segment, a worker must not unlink it on exit
+    shm = SharedMemory(name, track=False)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+from .segments import attach_segment, create_segment
+from .shard import cpu_nodes
+from .usage import snapshot, status_mb
+
+# queries per task handed to a worker, as for annoy's process executor
+SERVE_CHUNK = 64
+
+
+def _worker(
+    create_f, index_dir, dataset, dataset_config, train, cpus, tasks, done
+):
+    """Loop of one serving process: load the index its usual way, then
+    answer slices of the query segment until told to stop.
+
+    Every worker opens the same index file, faiss with IO_FLAG_MMAP, usearch
+    by view, annoy by load, so what they share is the page cache copy.
+    """
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    begin = time.perf_counter()
+    runner, index_path, config, _ = create_f(index_dir, dataset, dataset_config)
+    # the worker is the process, a runner must not fork its own under it
+    runner.load_index(train, index_path, 1, {**config, "executor": "thread"})
+    done.put(time.perf_counter() - begin)
+
+    names, segments = None, ()
+    while (task := tasks.get()) is not None:
+        queries_name, results_name, n, dims, k, start, end = task
+        if names != (queries_name, results_name):
+            for shm, _ in segments:
+                shm.close()
+            names = (queries_name, results_name)
+            segments = (
+                attach_segment(queries_name, (n, dims), np.float32),
+                attach_segment(results_name, (n, k), np.int64),
+            )
+        (_, queries), (_, results) = segments
+
+        pred, _ = runner.query_batch(queries[start:end], k)
+        results[start:end] = pred
+        done.put(end - start)
+
+    for shm, _ in segments:
+        shm.close()
+
+
+def _last_cpu(pid: int) -> int:
+    with open(f"/proc/{pid}/stat") as f:
+        # the command may hold spaces, the fields after it do not
+        fields = f.read().rsplit(")", 1)[1].split()
+    return int(fields[36])  # processor, field 39
+
+
+def node_file_pages_mb() -> dict[int, float]:
+    """node -> MB of page cache on it, machine wide."""
+    pages = {}
+    for node in cpu_nodes():
+        path = f"/sys/devices/system/node/node{node}/meminfo"
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if fields[2] == "FilePages:":
+                    pages[node] = int(fields[3]) / 1024
+    return pages
+
+
+class ServeProcesses:
+    """processes worker processes serving one index, fed over shared memory.
+
+    A batch goes into a query segment, the coordinator queues SERVE_CHUNK
+    slices of it, and whichever worker is free takes the next one and
+    writes its neighbours into the result segment. With pin, worker i is
+    bound to the cpus of node i % nodes.
+    """
+
+    def __init__(
+        self,
+        create_f,
+        index_dir: str,
+        dataset: str,
+        dataset_config,
+        train: np.ndarray,
+        processes: int,
+        pin: bool,
+    ):
+        self.cpus = cpu_nodes()
+        nodes = list(self.cpus)
+        self.pinned = {
+            i: nodes[i % len(nodes)] if pin else None for i in range(processes)
+        }
+
+        # fork: spawn would re-run run_ann.py, which has no main guard
+        ctx = multiprocessing.get_context("fork")
+        self._tasks = ctx.SimpleQueue()
+        self._done = ctx.SimpleQueue()
+        self.procs = [
+            ctx.Process(
+                target=_worker,
+                args=(
+                    create_f,
+                    index_dir,
+                    dataset,
+                    dataset_config,
+                    train,
+                    self.cpus[node] if node is not None else None,
+                    self._tasks,
+                    self._done,
+                ),
+                daemon=True,
+            )
+            for node in self.pinned.values()
+        ]
+
+        begin = time.perf_counter()
+        for proc in self.procs:
+            proc.start()
+        self.load_times = [self._done.get() for _ in self.procs]
+        self.load_time = time.perf_counter() - begin
+        self._buffers = {}
+
+        print(
+            f"Serving with {processes} processes"
+            f"{' pinned per node' if pin else ''}, loaded in "
+            f"{self.load_time:.2f}s"
+        )
+
+    def query_batch(self, test: np.ndarray, k: int):
+        n, dims = test.shape
+        if (n, k) not in self._buffers:
+            self._buffers[(n, k)] = (
+                create_segment((n, dims), np.float32),
+                create_segment((n, k), np.int64),
+            )
+        (queries_shm, queries), (results_shm, results) = self._buffers[(n, k)]
+        queries[:] = test
+        results.fill(-1)
+        chunks = [
+            (
+                queries_shm.name,
+                results_shm.name,
+                n,
+                dims,
+                k,
+                start,
+                min(start + SERVE_CHUNK, n),
+            )
+            for start in range(0, n, SERVE_CHUNK)
+        ]
+
+        start_time = time.perf_counter()
+        for chunk in chunks:
+            self._tasks.put(chunk)
+        for _ in chunks:
+            self._done.get()
+        end_time = time.perf_counter()
+        total_time = end_time - start_time
+
+        return results.copy(), total_time
+
+    def node_of(self, i: int) -> int:
+        """The node worker i is pinned to, or last ran on."""
+        if self.pinned[i] is not None:
+            return self.pinned[i]
+        cpu = _last_cpu(self.procs[i].pid)
+        return next(
+            (node for node, cpus in self.cpus.items() if cpu in cpus), -1
+        )
+
+    def rss(self) -> list[list[float]]:
+        """[RssAnon, RssFile, RssShmem] in MB, per worker."""
+        return [
+            status_mb("RssAnon", "RssFile", "RssShmem", pid=proc.pid)
+            for proc in self.procs
+        ]
+
+    def usage(self) -> list[tuple]:
+        """The usage snapshot of every worker."""
+        return [snapshot(proc.pid) for proc in self.procs]
+
+    def close(self):
+        for _ in self.procs:
+            self._tasks.put(None)
+        for proc in self.procs:
+            proc.join()
+        for segments in self._buffers.values():
+            for shm, _ in segments:
+                shm.close()
+                shm.unlink()
+        self._buffers = {}
@@ -0,0 +1,206 @@
+import asyncio
+import multiprocessing
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .histogram import LatencyHistogram
+
+# a request is (k, dims) then dims float32, a response (service ns, count)
+# then count int64 ids: little endian, fixed size, no parsing beyond struct
+REQUEST = struct.Struct("<II")
+RESPONSE = struct.Struct("<QI")
+# requests the server accepts past its busy executor threads, the rest wait
+# unread in their socket
+SERVER_BACKLOG = 4
+
+
+async def _handle(runner, executor, slots, reader, writer):
+    loop = asyncio.get_running_loop()
+
+    def query_f(vec, k):
+        begin = time.perf_counter_ns()
+        ids = runner.query(vec, k)
+        return time.perf_counter_ns() - begin, ids
+
+    try:
+        while True:
+            k, dims = REQUEST.unpack(await reader.readexactly(REQUEST.size))
+            vec = np.frombuffer(
+                await reader.readexactly(dims * 4), dtype=np.float32
+            )
+            async with slots:
+                service, ids = await loop.run_in_executor(
+                    executor, query_f, vec, k
+                )
+            ids = np.asarray(ids, dtype=np.int64)
+            writer.write(RESPONSE.pack(service, len(ids)) + ids.tobytes())
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        pass  # the client hung up
+    finally:
+        writer.close()
+
+
+async def _serve(runner, path: str, threads: int, ready):
+    executor = ThreadPoolExecutor(threads)
+    slots = asyncio.Semaphore(threads + SERVER_BACKLOG)
+    server = await asyncio.start_unix_server(
+        lambda r, w: _handle(runner, executor, slots, r, w), path
+    )
+    ready.send(None)
+    async with server:
+        await server.serve_forever()
+
+
+def _server(
+    create_f, index_dir, dataset, dataset_config, train, threads, path, ready
+):
+    runner, index_path, config, _ = create_f(index_dir, dataset, dataset_config)
+    begin = time.perf_counter()
+    # single queries on the server's own threads: a process executor's
+    # workers would be children terminate() orphans, segments and all
+    runner.load_index(
+        train, index_path, threads, {**config, "executor": "thread"}
+    )
+    ready.send(time.perf_counter() - begin)
+    asyncio.run(_serve(runner, path, threads, ready))
+
+
+class QueryServer:
+    """A runner behind an asyncio Unix socket server, in its own process.
+
+    Searches run on a threads wide executor, at most SERVER_BACKLOG more
+    requests are taken off the sockets while it is busy. Forked, so the
+    client's event loop and the server's do not share an interpreter.
+    """
+
+    def __init__(
+        self,
+        create_f,
+        index_dir: str,
+        dataset: str,
+        dataset_config,
+        train: np.ndarray,
+        threads: int,
+    ):
+        self.path = os.path.join(
+            tempfile.gettempdir(), f"ann-server-{os.getpid()}.sock"
+        )
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        # fork: spawn would re-run run_ann.py, which has no main guard
+        ctx = multiprocessing.get_context("fork")
+        self._ready, ready = ctx.Pipe(duplex=False)
+        self.proc = ctx.Process(
+            target=_server,
+            args=(
+                create_f,
+                index_dir,
+                dataset,
+                dataset_config,
+                train,
+                threads,
+                self.path,
+                ready,
+            ),
+            daemon=True,
+        )
+        self.proc.start()
+        self.load_time = self._wait()
+        self._wait()  # listening
+
+        print(
+            f"Serving on {self.path}, threads={threads}, loaded in "
+            f"{self.load_time:.2f}s"
+        )
+
+    def _wait(self):
+        while not self._ready.poll(1):
+            if not self.proc.is_alive():
+                raise RuntimeError(
+                    f"Query server exited with {self.proc.exitcode}"
+                )
+        return self._ready.recv()
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.join()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def _replay(
+    path: str, test: np.ndarray, k: int, concurrency: int, duration: float
+):
+    n = test.shape[0]
+    queries = [
+        REQUEST.pack(k, test.shape[1])
+        + np.ascontiguousarray(test[i], dtype=np.float32).tobytes()
+        for i in range(n)
+    ]
+    pred = np.full((n, k), -1, dtype=np.int64)
+    # recorded into the histograms at the end, not on the request path
+    response, service = [], []
+    issued = 0
+    start_ns = time.perf_counter_ns()
+
+    def next_query():
+        nonlocal issued
+        # at least one pass over test, for the recall
+        if issued >= n and time.perf_counter_ns() - start_ns >= duration * 1e9:
+            return None
+        issued += 1
+        return issued - 1
+
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(path)
+        while (j := next_query()) is not None:
+            begin = time.perf_counter_ns()
+            writer.write(queries[j % n])
+            await writer.drain()
+            service_ns, count = RESPONSE.unpack(
+                await reader.readexactly(RESPONSE.size)
+            )
+            ids = np.frombuffer(
+                await reader.readexactly(count * 8), dtype=np.int64
+            )
+            end = time.perf_counter_ns()
+            response.append(end - begin)
+            service.append(service_ns)
+            if j < n:
+                pred[j, :count] = ids[:k]
+        writer.close()
+        await writer.wait_closed()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+
+    response_hist = LatencyHistogram()
+    response_hist.record(response)
+    service_hist = LatencyHistogram()
+    service_hist.record(service)
+    return {
+        "queries": issued,
+        "qps": issued / elapsed,
+        "pred": pred,
+        "response": response_hist,
+        "service": service_hist,
+    }
+
+
+def replay(
+    path: str, test: np.ndarray, k: int, concurrency: int, duration: float
+):
+    """test over concurrency connections to the server at path, closed loop.
+
+    Each connection sends a query and waits for its ids before the next;
+    they go through test in order, round again until duration is up. The
+    response time is the client's, from the first byte sent to the last
+    byte read: framing, the socket and the server's scheduling included.
+    The service time is the search alone, as the server timed it.
+    """
+    return asyncio.run(_replay(path, test, k, concurrency, duration))
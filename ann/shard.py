@@ -0,0 +1,217 @@
+import itertools
+import multiprocessing.pool
+import os
+import threading
+import time
+import numpy as np
+from bench_sharing import node_cpus
+from .histogram import LatencyHistogram
+
+NODE_DIR = "/sys/devices/system/node"
+
+
+def cpu_nodes() -> dict[int, list[int]]:
+    """node -> cpus, for every node that has cpus (memory only ones do not)."""
+    nodes = sorted(
+        int(name[4:])
+        for name in os.listdir(NODE_DIR)
+        if name[:4] == "node" and name[4:].isdigit()
+    )
+    return {node: cpus for node in nodes if (cpus := node_cpus(node))}
+
+
+def allowed_cpu_nodes() -> dict[int, list[int]]:
+    """cpu_nodes, cut to the cpus the process may already run on.
+
+    A --serve-pin worker, or a run bound by taskset or numactl, keeps its
+    threads where it was put, and a node it may not use has none.
+    """
+    allowed = os.sched_getaffinity(0)
+    return {
+        node: node_cpus
+        for node, cpus in cpu_nodes().items()
+        if (node_cpus := sorted(allowed.intersection(cpus)))
+    }
+
+
+def pinned_pool(threads: int) -> multiprocessing.pool.ThreadPool:
+    """A thread pool spread evenly over the nodes, each thread pinned to one.
+
+    Worker i goes to node i % nodes, so any thread count splits as evenly as
+    it can, and every node's memory controller sees the same share. Only
+    the allowed_cpu_nodes count.
+    """
+    cpus = list(allowed_cpu_nodes().values()) or [
+        sorted(os.sched_getaffinity(0))
+    ]
+    order = itertools.count()
+    lock = threading.Lock()
+
+    def pin():
+        with lock:
+            i = next(order)
+        os.sched_setaffinity(0, cpus[i % len(cpus)])
+
+    return multiprocessing.pool.ThreadPool(threads, initializer=pin)
+
+
+class NodeShards:
+    """One thread pool per NUMA node, every thread pinned to its node's cpus.
+
+    A batch is cut into one contiguous slice per node and each pool serves
+    its own slice with single queries, so where a query runs is fixed by the
+    slice it falls in, and a replication gain can only come from where the
+    pages are. Runner agnostic: all it needs is runner.query. Only the
+    allowed_cpu_nodes get a pool.
+    """
+
+    def __init__(self, threads: int):
+        self.cpus = allowed_cpu_nodes()
+        per_node = max(1, threads // len(self.cpus))
+        self.threads = {
+            node: min(per_node, len(cpus)) for node, cpus in self.cpus.items()
+        }
+        # pid 0 is the calling thread: the initializer pins each worker alone
+        self.pools = {
+            node: multiprocessing.pool.ThreadPool(
+                self.threads[node],
+                initializer=os.sched_setaffinity,
+                initargs=(0, self.cpus[node]),
+            )
+            for node in self.cpus
+        }
+
+        print(
+            "Shards "
+            + " ".join(f"node{node}={t}" for node, t in self.threads.items())
+        )
+
+    def query_batch(self, runner, test: np.ndarray, k: int):
+        """(pred, total time, latency histogram, node -> (queries, time))."""
+        return self._query_batch(dict.fromkeys(self.pools, runner), test, k)
+
+    def _query_batch(self, runners: dict, test: np.ndarray, k: int):
+        """query_batch, node serving its slice with runners[node]."""
+        n = test.shape[0]
+        pred = np.full((n, k), -1, dtype=np.int64)
+        latencies = np.empty(n, dtype=np.int64)
+        slices = dict(
+            zip(self.pools, np.array_split(np.arange(n), len(self.pools)))
+        )
+        node_times = {}
+
+        def query_f(node_i):
+            node, i = node_i
+            begin = time.perf_counter_ns()
+            found = runners[node].query(test[i], k)
+            latencies[i] = time.perf_counter_ns() - begin
+            pred[i, : len(found)] = found
+
+        def done_f(node):
+            # runs on the pool's result thread the moment the slice is done,
+            # not when the caller gets around to waiting on it
+            def done(_):
+                node_times[node] = time.perf_counter() - start_time
+
+            return done
+
+        start_time = time.perf_counter()
+        results = [
+            pool.map_async(
+                query_f,
+                [(node, i) for i in slices[node]],
+                callback=done_f(node),
+            )
+            for node, pool in self.pools.items()
+        ]
+        for result in results:
+            result.get()
+        end_time = time.perf_counter()
+        total_time = end_time - start_time
+
+        hist = LatencyHistogram()
+        hist.record(latencies)
+        nodes = {node: (len(slices[node]), node_times[node]) for node in slices}
+        return pred, total_time, hist, nodes
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+
+def node_footprint_mb(pid: int | str = "self") -> dict[int, float]:
+    """node -> MB of pid's resident pages on it, from numa_maps."""
+    footprint = {}
+    with open(f"/proc/{pid}/numa_maps") as f:
+        for line in f:
+            fields = line.split()
+            page_kb = next(
+                (
+                    int(field.split("=")[1])
+                    for field in fields
+                    if field.startswith("kernelpagesize_kB=")
+                ),
+                4,
+            )
+            for field in fields:
+                key, _, value = field.partition("=")
+                if key[:1] == "N" and key[1:].isdigit():
+                    node = int(key[1:])
+                    mb = int(value) * page_kb / 1024
+                    footprint[node] = footprint.get(node, 0) + mb
+    return footprint
+
+
+class NodeReplicas(NodeShards):
+    """NodeShards where every node queries its own copy of the index.
+
+    The userspace answer to kernel replication: each copy is loaded by one
+    of its node's own threads with runner.load_replica, into memory that
+    first touch places on that node, and each node's slice of a batch is
+    served from it. Costs a full index per node, which load reports.
+    """
+
+    def load(
+        self, create_f, index_dir: str, dataset: str, dataset_config, train
+    ):
+        """Load every node's copy, all nodes at once.
+
+        self.load_times is node -> seconds its copy took, self.footprint
+        node -> MB the process gained on the node, both copy and overhead.
+        """
+        before = node_footprint_mb()
+
+        def load_f(node):
+            begin = time.perf_counter()
+            runner, index_path, config, _ = create_f(
+                index_dir, dataset, dataset_config
+            )
+            runner.load_replica(train, index_path, self.threads[node], config)
+            return runner, time.perf_counter() - begin
+
+        results = {
+            node: pool.apply_async(load_f, (node,))
+            for node, pool in self.pools.items()
+        }
+        loaded = {node: result.get() for node, result in results.items()}
+        self.runners = {node: runner for node, (runner, _) in loaded.items()}
+        self.load_times = {node: t for node, (_, t) in loaded.items()}
+
+        after = node_footprint_mb()
+        self.footprint = {
+            node: after.get(node, 0) - before.get(node, 0)
+            for node in self.pools
+        }
+
+        print(
+            "Replicas "
+            + " ".join(
+                f"node{node}={self.footprint[node]:.0f}M "
+                f"in {self.load_times[node]:.2f}s"
+                for node in self.pools
+            )
+        )
+
+    def query_batch(self, test: np.ndarray, k: int):
+        """NodeShards.query_batch, each node on its own copy."""
+        return self._query_batch(self.runners, test, k)
@@ -0,0 +1,190 @@
+import math
+import os
+import re
+import multiprocessing.pool
+from dataclasses import dataclass
+import h5py
+import numpy as np
+from . import arrays
+from .build import BUILD_CHUNK
+
+# queries per synthetic dataset: every one of them scans all of train for
+# its ground truth, and again on every run of the exact runner
+SYNTH_QUERIES = 1_000
+SYNTH_CLUSTERS = 1_024
+# a point is its cluster's center plus this much noise per dimension, the
+# centers being standard normal too: neighboring clusters overlap, so IVF
+# probing has to work for its recall (faiss ~0.9 at nlist/16 probes)
+CLUSTER_SPREAD = 1.0
+
+NAME_RE = re.compile(
+    r"synth-(\d+)-(euclidean|angular)-n(\d+)-c(\d+)(?:-s(\d+))?\.hdf5$"
+)
+
+# the size sweep doubles from 1G until train no longer fits one node, but
+# stops short of this much of the machine
+SWEEP_START_GB = 1
+SWEEP_MACHINE_FRACTION = 0.75
+
+
+@dataclass(frozen=True)
+class Spec:
+    """A generated dataset, named so that the name is the whole recipe."""
+
+    dims: int
+    metric: str
+    count: int
+    clusters: int = SYNTH_CLUSTERS
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        name = f"synth-{self.dims}-{self.metric}-n{self.count}-c{self.clusters}"
+        if self.seed:
+            name = f"{name}-s{self.seed}"
+        return f"{name}.hdf5"
+
+    @property
+    def train_bytes(self) -> int:
+        return self.count * self.dims * np.dtype(np.float32).itemsize
+
+
+def parse(dataset: str) -> Spec | None:
+    """The Spec a dataset name stands for, None for a downloaded dataset."""
+    m = NAME_RE.match(os.path.basename(dataset))
+    if m is None:
+        return None
+    dims, metric, count, clusters, seed = m.groups()
+    return Spec(int(dims), metric, int(count), int(clusters), int(seed or 0))
+
+
+def for_gb(
+    gb: float, dims: int = 128, metric: str = "euclidean", seed: int = 0
+) -> Spec:
+    """The Spec whose train is gb gigabytes of float32."""
+    count = int(gb * 2**30) // (dims * np.dtype(np.float32).itemsize)
+    return Spec(dims, metric, count, seed=seed)
+
+
+def runner_config(spec: Spec) -> dict:
+    """CONFIG for a generated dataset, scaled with its count."""
+    nlist = max(100, int(math.sqrt(spec.count)))
+    nprobe = max(1, nlist // 16)
+    # 4 dims per PQ byte where dims allows it, else 2, else 1
+    m = next(spec.dims // d for d in (4, 2, 1) if spec.dims % d == 0)
+    return {
+        "faiss": {"nlist": nlist, "nprobe": nprobe},
+        "faiss-ivfpq": {"nlist": nlist, "m": m, "nbits": 8, "nprobe": nprobe},
+        "faiss-ivfsq8": {"nlist": nlist, "nprobe": nprobe},
+        "faiss-hnsw": {"M": 32, "ef_construction": 200, "ef_search": 256},
+        "annoy": {"trees": 100, "search_k": 40_000},
+        "usearch": {"e_search": 256},
+    }
+
+
+def _centers(spec: Spec) -> np.ndarray:
+    rng = np.random.default_rng([spec.seed, 0])
+    return rng.standard_normal((spec.clusters, spec.dims), dtype=np.float32)
+
+
+def _rows(spec: Spec, centers: np.ndarray, stream: int, start: int, n: int):
+    """Rows [start, start + n) of a stream, the same whatever the chunking.
+
+    Each chunk has its own generator, seeded by where it starts, so chunks
+    can be drawn in any order and on any thread.
+    """
+    rng = np.random.default_rng([spec.seed, stream, start])
+    labels = rng.integers(0, spec.clusters, n)
+    noise = rng.standard_normal((n, spec.dims), dtype=np.float32)
+    noise *= CLUSTER_SPREAD
+    return centers[labels] + noise
+
+
+def _write_rows(
+    pool,
+    threads: int,
+    spec: Spec,
+    centers: np.ndarray,
+    stream: int,
+    n: int,
+    path: str,
+):
+    def chunks():
+        starts = list(range(0, n, BUILD_CHUNK))
+        # one chunk per thread at a time, so memory stays bounded
+        for i in range(0, len(starts), threads):
+            yield from pool.map(
+                lambda start: _rows(
+                    spec, centers, stream, start, min(BUILD_CHUNK, n - start)
+                ),
+                starts[i : i + threads],
+            )
+
+    arrays.write(path, (n, spec.dims), np.dtype(np.float32), chunks())
+
+
+def generate(spec: Spec, out_dir: str, threads: int):
+    """spec's train, test and exact neighbors as .npy in out_dir.
+
+    The layout arrays.convert leaves, so run maps it like any dataset.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    print(
+        f"Generating {spec.name}: {spec.count} x {spec.dims} "
+        f"({spec.train_bytes / 2**30:.1f}G), {spec.clusters} clusters"
+    )
+    centers = _centers(spec)
+    pool = multiprocessing.pool.ThreadPool(threads)
+    for stream, (name, n) in enumerate(
+        [("train", spec.count), ("test", SYNTH_QUERIES)], start=1
+    ):
+        path = os.path.join(out_dir, f"{name}.npy")
+        if not os.path.exists(path):
+            _write_rows(pool, threads, spec, centers, stream, n, path)
+    pool.close()
+
+    if not os.path.exists(os.path.join(out_dir, "neighbors.npy")):
+        arrays.write_ground_truth(out_dir, spec.name, threads)
+
+
+def write_hdf5(out_dir: str, hdf5_path: str):
+    """Export a converted or generated dataset in ann-benchmarks' HDF5."""
+    names = arrays.ARRAYS + ["distances"]
+    with h5py.File(f"{hdf5_path}.part", "w") as f:
+        for name in names:
+            path = os.path.join(out_dir, f"{name}.npy")
+            if not os.path.exists(path):
+                continue
+            array = np.load(path, mmap_mode="r")
+            dataset = f.create_dataset(name, array.shape, array.dtype)
+            for start in range(0, array.shape[0], BUILD_CHUNK):
+                dataset[start : start + BUILD_CHUNK] = array[
+                    start : start + BUILD_CHUNK
+                ]
+    os.replace(f"{hdf5_path}.part", hdf5_path)
+
+
+def _node_mem_bytes() -> list[int]:
+    base = "/sys/devices/system/node"
+    sizes = []
+    for node in sorted(os.listdir(base)):
+        if not re.fullmatch(r"node\d+", node):
+            continue
+        with open(os.path.join(base, node, "meminfo")) as f:
+            for line in f:
+                if "MemTotal:" in line:
+                    sizes.append(int(line.split()[3]) * 1024)
+    return sizes
+
+
+def sweep_gb() -> list[int]:
+    """Train sizes from SWEEP_START_GB, doubling up to the first that no
+    longer fits the smallest node."""
+    nodes = _node_mem_bytes()
+    node, machine = min(nodes), sum(nodes)
+    sizes = [SWEEP_START_GB]
+    while sizes[-1] * 2**30 < node:
+        if sizes[-1] * 2 * 2**30 > machine * SWEEP_MACHINE_FRACTION:
+            break
+        sizes.append(sizes[-1] * 2)
+    return sizes
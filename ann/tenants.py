@@ -0,0 +1,143 @@
+import multiprocessing
+import time
+import numpy as np
+from .shard import NodeReplicas, node_footprint_mb
+
+
+def _tenant(
+    create_f,
+    index_dir,
+    dataset,
+    dataset_config,
+    train,
+    test,
+    k,
+    threads,
+    replica,
+    duration,
+    start,
+    conn,
+):
+    begin = time.perf_counter()
+    # what the fork brought along: interpreter, numpy, train and test
+    before = node_footprint_mb()
+    if replica:
+        shards = NodeReplicas(threads)
+        shards.load(create_f, index_dir, dataset, dataset_config, train)
+
+        def query_f():
+            pred, total_time, _, _ = shards.query_batch(test, k)
+            return pred, total_time
+
+    else:
+        runner, index_path, config, _ = create_f(
+            index_dir, dataset, dataset_config
+        )
+        runner.load_index(train, index_path, threads, config)
+
+        def query_f():
+            return runner.query_batch(test, k)
+
+    # faulted in before the clock starts, as every other mode does
+    query_f()
+    conn.send((time.perf_counter() - begin, before))
+
+    start.wait()
+    qpss = []
+    begin = time.perf_counter()
+    while True:
+        pred, total_time = query_f()
+        qpss.append(test.shape[0] / total_time)
+        if time.perf_counter() - begin >= duration:
+            break
+    conn.send(
+        {
+            "pred": pred,
+            "qpss": qpss,
+            "queries": len(qpss) * test.shape[0],
+            "elapsed": time.perf_counter() - begin,
+        }
+    )
+    if replica:
+        shards.close()
+
+
+class Tenant:
+    """One dataset's runner in its own process, co-located with the others.
+
+    It loads its index on threads threads (or a replica per node, with
+    replica), runs test once, and waits for start; then it runs test over
+    and over for duration seconds. Forked, so tenants share nothing but the
+    machine: their indices, page cache and memory bandwidth compete.
+    """
+
+    def __init__(
+        self,
+        create_f,
+        index_dir: str,
+        dataset: str,
+        dataset_config,
+        train: np.ndarray,
+        test: np.ndarray,
+        k: int,
+        threads: int,
+        replica: bool,
+        duration: float,
+        start,
+    ):
+        self.dataset = dataset
+        self.threads = threads
+        # fork: spawn would re-run run_ann.py, which has no main guard
+        ctx = multiprocessing.get_context("fork")
+        self._conn, conn = ctx.Pipe(duplex=False)
+        self.proc = ctx.Process(
+            target=_tenant,
+            args=(
+                create_f,
+                index_dir,
+                dataset,
+                dataset_config,
+                train,
+                test,
+                k,
+                threads,
+                replica,
+                duration,
+                start,
+                conn,
+            ),
+            daemon=True,
+        )
+        self.proc.start()
+
+    def _wait(self):
+        while not self._conn.poll(1):
+            if not self.proc.is_alive():
+                raise RuntimeError(
+                    f"Tenant {self.dataset} exited with {self.proc.exitcode}"
+                )
+        return self._conn.recv()
+
+    def loaded(self) -> float:
+        """Seconds the load and the first pass took, once they are done."""
+        self.load_time, self._before = self._wait()
+        return self.load_time
+
+    def footprint(self) -> dict[int, float]:
+        """node -> MB the tenant gained on it since before its load."""
+        after = node_footprint_mb(self.proc.pid)
+        return {
+            node: after.get(node, 0) - self._before.get(node, 0)
+            for node in after.keys() | self._before.keys()
+        }
+
+    def result(self) -> dict:
+        """The timed runs: pred of the last one, QPS of each, queries."""
+        result = self._wait()
+        self.proc.join()
+        return result
+
+    def close(self):
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc.join()
@@ -0,0 +1,80 @@
+import glob
+import resource
+
+# what a bench is charged with: per run of runner_bench in
+# <dataset>-details.csv, per point of the batch and cache modes, per worker
+# of the serve mode. rusage deltas over the runs, then RSS after them and
+# its growth during them
+USAGE_COLUMNS = [
+    "minflt",
+    "majflt",
+    "nvcsw",
+    "nivcsw",
+    "rss_file_mb",
+    "rss_anon_mb",
+    "rss_file_delta_mb",
+    "rss_anon_delta_mb",
+]
+
+
+def status_mb(*fields: str, pid: int | str = "self") -> list[float]:
+    """fields of pid's /proc status, in MB."""
+    values = dict.fromkeys(fields, 0.0)
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in values:
+                values[key] = int(rest.split()[0]) / 1024
+    return [values[field] for field in fields]
+
+
+def _proc_counts(pid: int) -> tuple:
+    """getrusage's fault and context switch counts, of another process.
+
+    The faults are the process's own in /proc stat; the switches are only
+    kept per thread, and a thread that exited takes its share with it.
+    """
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    switches = [0, 0]
+    for task in glob.glob(f"/proc/{pid}/task/*/status"):
+        try:
+            with open(task) as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key == "voluntary_ctxt_switches":
+                        switches[0] += int(rest)
+                    elif key == "nonvoluntary_ctxt_switches":
+                        switches[1] += int(rest)
+        except OSError:
+            continue  # exited since glob
+    return int(fields[7]), int(fields[9]), *switches
+
+
+def snapshot(pid: int | str = "self") -> tuple:
+    """pid's counters now, all threads included.
+
+    Workers of another process (annoy's process executor, the serve mode's)
+    fault on their own account and are not in the caller's: snapshot them
+    by pid.
+    """
+    if pid == "self":
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        counts = (ru.ru_minflt, ru.ru_majflt, ru.ru_nvcsw, ru.ru_nivcsw)
+    else:
+        counts = _proc_counts(pid)
+    rss_file, rss_anon = status_mb("RssFile", "RssAnon", pid=pid)
+    return (*counts, rss_file, rss_anon)
+
+
+def delta(before: tuple, after: tuple) -> list:
+    """USAGE_COLUMNS of what happened between two snapshots."""
+    counts = [b - a for a, b in zip(before[:4], after[:4])]
+    rss_file, rss_anon = after[4:]
+    return [
+        *counts,
+        rss_file,
+        rss_anon,
+        rss_file - before[4],
+        rss_anon - before[5],
+    ]
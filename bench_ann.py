@@ -1,6 +1,10 @@
 import subprocess
 from dataclasses import dataclass
 
+import ann.advise
+import ann.mod_faiss
+import ann.mod_usearch
+import ann.synth
 from config import sh
 
 
@@ -25,8 +29,46 @@ def get_interleaved_cpus_one_node() -> str:
 PRESSURE_DATASET = "gist-960-euclidean.hdf5"
 
 
+# every faiss family is benched under every placement
+FAISS_FAMILIES = " ".join(ann.mod_faiss.FAMILIES)
+
+# the index files replication applies to, by suffix (see ann/lib.py); the
+# live files --write-rate persists keep their index's suffix
+INDEX_SUFFIXES = [".ivf", ".ivfpq", ".ivfsq8", ".hnsw", ".ann", ".usearch"]
+
+
+def register_index_files():
+    sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
+    for suffix in INDEX_SUFFIXES:
+        sh(f"echo {suffix} > /sys/kernel/debug/repl_pt/registered")
+
+
+# inserts per second the read-while-writing runs offer, 0 the read only
+# baseline; the runners that can insert
+WRITE_RATES = "0 100 1000 10000"
+WRITE_RUNNERS = "--faiss --usearch"
+
+
+def run_bench_write(tag: str) -> str:
+    return (
+        f"uv run run_ann.py {WRITE_RUNNERS} --bench --tag {tag}"
+        f" --write-rate {WRITE_RATES}"
+    )
+
+
+# result cache sizes the Zipfian replay runs behind, 0 the uncached baseline
+CACHE_SIZES = "0 100 1000"
+
+
+def run_bench_cache(tag: str) -> str:
+    return f"{run_bench(tag)} --cache-size {CACHE_SIZES}"
+
+
 def run_bench(tag: str) -> str:
-    return f"uv run run_ann.py --faiss --annoy --usearch --bench --tag {tag}"
+    return (
+        f"uv run run_ann.py --faiss --faiss-families {FAISS_FAMILIES}"
+        f" --annoy --usearch --bench --tag {tag}"
+    )
 
 
 def run_bench_ann():
@@ -51,15 +93,107 @@ def run_bench_ann():
     sh(f"{run_bench('numa-balancing')}")
     sh("echo 0 > /proc/sys/kernel/numa_balancing")
 
+    # userspace replication, a private copy per node: what patched-repl is
+    # measured against
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench('app-repl')} --replica")
+
+    # readers against a writer, where the write path shows
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench_write('write-default')}")
+
+    # hot queries absorbed by a result cache, what reaches the index
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench_cache('cache-default')}")
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench_cache('cache-app-repl')} --replica")
+
+    # every dataset at once, each its share of the cores
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench('tenants-default')} --tenants")
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench('tenants-app-repl')} --tenants --replica")
+
+
+def run_bench_ann_advice():
+    """Every readahead hint from a cold page cache: run 1 of each is the
+    cold start, the rest warm."""
+    sh("echo 0 > /proc/sys/kernel/numa_balancing")
+
+    for hint in ann.advise.HINTS:
+        sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+        sh(f"{run_bench(f'advice-{hint}')} --exact --advice {hint}")
+
+
+# every usearch vector dtype, an index file each: the footprint a replica
+# costs against the recall and QPS it keeps. run_ann skips i8 on the
+# euclidean datasets, whose components it cannot hold
+DTYPES = " ".join(ann.mod_usearch.DTYPES)
+
+
+def run_bench_dtype(tag: str) -> str:
+    return (
+        f"uv run run_ann.py --usearch --usearch-dtypes {DTYPES}"
+        f" --bench --tag {tag}"
+    )
+
+
+def run_bench_ann_dtype():
+    sh("echo 0 > /proc/sys/kernel/numa_balancing")
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench_dtype('dtype-default')}")
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(
+        f"numactl --interleave=all {run_bench_dtype('dtype-interleaved-memory')}"
+    )
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"{run_bench_dtype('dtype-app-repl')} --replica")
+
+
+def run_bench_ann_dtype_repl():
+    sh("echo 0 > /sys/kernel/debug/repl_pt/main_placement")
+    register_index_files()
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"""(
+      echo 1 > /sys/kernel/debug/repl_pt/policy &&
+      {run_bench_dtype("dtype-patched-repl")};
+      echo 0 > /sys/kernel/debug/repl_pt/policy
+    )""")
+
+
+# the size sweep: exact is the bandwidth bound, faiss the index that grows
+# with train; neither builds for hours at the top of the sweep
+SIZE_RUNNERS = "--exact --faiss"
+SIZE_RUNNING_TIME = 300
+
+
+def run_bench_ann_size():
+    """Synthetic train from 1G to past a node's memory, one dataset each."""
+    sh("echo 0 > /proc/sys/kernel/numa_balancing")
+
+    datasets = " ".join(
+        ann.synth.for_gb(gb).name for gb in ann.synth.sweep_gb()
+    )
+    for tag, numactl in [
+        ("size-default", ""),
+        ("size-interleaved-memory", "numactl --interleave=all "),
+    ]:
+        sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+        sh(
+            f"{numactl}uv run run_ann.py {SIZE_RUNNERS} --bench --tag {tag}"
+            f" --datasets {datasets} --running-time {SIZE_RUNNING_TIME}"
+        )
+
 
 def run_bench_ann_repl():
     sh("echo 0 > /sys/kernel/debug/repl_pt/main_placement")
 
     # baseline patched, all cores, repl
-    sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
-    sh("echo .ivf > /sys/kernel/debug/repl_pt/registered")
-    sh("echo .ann > /sys/kernel/debug/repl_pt/registered")
-    sh("echo .usearch > /sys/kernel/debug/repl_pt/registered")
+    register_index_files()
 
     # run
     sh("sync; echo 3 > /proc/sys/vm/drop_caches")
@@ -69,6 +203,27 @@ def run_bench_ann_repl():
       echo 0 > /sys/kernel/debug/repl_pt/policy
     )""")
 
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"""(
+      echo 1 > /sys/kernel/debug/repl_pt/policy &&
+      {run_bench_write("write-patched-repl")};
+      echo 0 > /sys/kernel/debug/repl_pt/policy
+    )""")
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"""(
+      echo 1 > /sys/kernel/debug/repl_pt/policy &&
+      {run_bench_cache("cache-patched-repl")};
+      echo 0 > /sys/kernel/debug/repl_pt/policy
+    )""")
+
+    sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+    sh(f"""(
+      echo 1 > /sys/kernel/debug/repl_pt/policy &&
+      {run_bench("tenants-patched-repl")} --tenants;
+      echo 0 > /sys/kernel/debug/repl_pt/policy
+    )""")
+
 
 # The pressure bench is the odd one out: it does not run its own command, it
 # hands it to pressure.py, which runs it inside a squeezed cgroup.
@@ -125,10 +280,7 @@ def run_bench_pressure(variant: PressureVariant, running_time: int) -> str:
             f"echo {variant.main_placement} >"
             " /sys/kernel/debug/repl_pt/main_placement"
         )
-        sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
-        sh("echo .ivf > /sys/kernel/debug/repl_pt/registered")
-        sh("echo .ann > /sys/kernel/debug/repl_pt/registered")
-        sh("echo .usearch > /sys/kernel/debug/repl_pt/registered")
+        register_index_files()
         cmd = f"""(
           echo 1 > /sys/kernel/debug/repl_pt/policy &&
           {cmd};
@@ -149,10 +301,7 @@ def run_bench_ann_pressure():
 def run_bench_ann_pressure_repl():
     sh("echo 0 > /sys/kernel/debug/repl_pt/main_placement")
 
-    sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
-    sh("echo .ivf > /sys/kernel/debug/repl_pt/registered")
-    sh("echo .ann > /sys/kernel/debug/repl_pt/registered")
-    sh("echo .usearch > /sys/kernel/debug/repl_pt/registered")
+    register_index_files()
 
     sh("sync; echo 3 > /proc/sys/vm/drop_caches")
     sh(f"""(
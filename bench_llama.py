@@ -1,6 +1,9 @@
 import os
 from config import sh, RESULT_DIR_LLAMA
 
+BIN = "./llama.cpp/build/bin/llama-bench"
+MODEL = "./llama.cpp/Llama-3.1-Tulu-3-8B-Q8_0.gguf"
+
 
 def run_repl(cmd: str) -> str:
     return f"""(
@@ -14,7 +17,7 @@ def run_bench(tag: str, repl_enabled: bool, numa_distribute=False):
     os.makedirs(RESULT_DIR_LLAMA, exist_ok=True)
     csv_path = os.path.join(RESULT_DIR_LLAMA, f"{tag}.csv")
 
-    cmd = "./llama.cpp/build/bin/llama-bench -m ./llama.cpp/Llama-3.1-Tulu-3-8B-Q8_0.gguf -t $(nproc --all) --mmap 1 -n 128,256,512"
+    cmd = f"{BIN} -m {MODEL} -t $(nproc --all) --mmap 1 -n 128,256,512"
 
     if numa_distribute:
         cmd = f"{cmd} --numa distribute"
@@ -43,8 +46,6 @@ def run_bench_llama_repl():
     sh("echo 0 > /sys/kernel/debug/repl_pt/main_placement")
 
     sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
-    sh(
-        "echo Llama-3.1-Tulu-3-8B-Q8_0.gguf > /sys/kernel/debug/repl_pt/registered"
-    )
+    sh(f"echo {os.path.basename(MODEL)} > /sys/kernel/debug/repl_pt/registered")
     sh("sync; echo 3 > /proc/sys/vm/drop_caches")
     sh(f"{run_bench(tag='repl', repl_enabled=True)}")
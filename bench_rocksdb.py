@@ -24,7 +24,13 @@ NB_RUNS = 5
 
 LOAD_ENV = f"DB_DIR={DB_DIR} WAL_DIR={WAL_DIR} NUM_KEYS={NUM_KEYS} CACHE_SIZE={CACHE_SIZE} COMPRESSION_TYPE={COMPRESSION_TYPE}"
 NUM_NEXTS_PER_SEEK = 200
-BENCH_ENV = f"{LOAD_ENV} DURATION={DURATION} STATS_INTERVAL_SECONDS={STAT_INTERVAL_SECONDS} NUM_THREADS={NUM_THREADS} NUM_NEXTS_PER_SEEK={NUM_NEXTS_PER_SEEK}"
+
+
+def bench_env(duration: int = DURATION) -> str:
+    return f"{LOAD_ENV} DURATION={duration} STATS_INTERVAL_SECONDS={STAT_INTERVAL_SECONDS} NUM_THREADS={NUM_THREADS} NUM_NEXTS_PER_SEEK={NUM_NEXTS_PER_SEEK}"
+
+
+BENCH_ENV = bench_env()
 BENCHMARK_SCRIPT = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
     "rocksdb",
@@ -61,7 +67,7 @@ def decomment(csvfile):
             yield raw
 
 
-def _bench_cmd(
+def bench_cmd(
     variant: str, bench_env: str, output_option: str, numactl_invoc: str
 ) -> str:
     """Build the benchmark.sh shell command for a given variant."""
@@ -87,7 +93,7 @@ def _drop_caches():
     sh("sync; echo 3 > /proc/sys/vm/drop_caches")
 
 
-def _load_db(output_tag: str, numactl_invoc: str = ""):
+def load_db(output_tag: str, numactl_invoc: str = ""):
     """Bulkload the database. Callers drop the caches afterwards."""
     output_dir = os.path.join(RESULT_DIR, "outputs", f"{output_tag}_load")
     shutil.rmtree(output_dir, ignore_errors=True)
@@ -108,7 +114,7 @@ def _prepare_round(
     comparable with each other and with the per-round-reload results.
     """
     if run_idx == 0 or bench not in READ_ONLY_BENCHES:
-        _load_db(output_tag, numactl_invoc)
+        load_db(output_tag, numactl_invoc)
     _drop_caches()
 
 
@@ -132,11 +138,11 @@ def _do_bench(
         repl_start = "echo 1 > /sys/kernel/debug/repl_pt/policy &&"
         repl_end = "&& echo 0 > /sys/kernel/debug/repl_pt/policy"
 
-    bench_cmd = _bench_cmd(
+    cmd = bench_cmd(
         variant, BENCH_ENV, f"OUTPUT_DIR={output_dir}", numactl_invoc
     )
     start_time = get_time()
-    sh(f"{repl_start} {bench_cmd} {repl_end}", cwd=BUILD_DIR)
+    sh(f"{repl_start} {cmd} {repl_end}", cwd=BUILD_DIR)
     end_time = get_time()
 
     with open(report_path, mode="r", newline="") as f:
@@ -246,7 +252,7 @@ def run_bench_rocksdb_repl():
     # for bench in BENCHES:
     #     for run_idx in range(NB_RUNS):
     #         numactl = "numactl --interleave=all"
-    #         _load_db(f"patched-interleaved-{bench}-round{run_idx}", numactl)
+    #         load_db(f"patched-interleaved-{bench}-round{run_idx}", numactl)
     #         _do_bench(
     #             f"patched-interleaved-{bench}",
     #             bench,
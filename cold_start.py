@@ -0,0 +1,391 @@
+"""Time to first result from a cold page cache, for every bench's workload.
+
+Each workload is started as its own process right after drop_caches, and
+everything is stamped with CLOCK_MONOTONIC, the one clock the workloads
+started here can read too:
+
+    start    just before the process is spawned, the 0 of every row
+    open     the index, model or DB is open: for run_ann the runner's own
+             stamp; for llama-bench and db_bench, the first time the file is
+             mapped or opened by the process or any of its children
+    first    the first result: run_ann's first single query; the end of
+             llama-bench's first repetition; db_bench's first one second
+             report with a completed read (so to the second)
+    steady   the end of the first interval whose rate reaches STEADY_FRACTION
+             of the steady rate, the mean over the second half of the run
+
+A CSV per placement tag, a row per workload and run.
+
+    uv run run.py cold-start         # stock kernel placements
+    uv run run.py cold-start-repl    # patched kernel, replicated
+"""
+
+import csv
+import ctypes
+import ctypes.util
+import glob
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+
+import bench_ann
+import bench_llama
+import bench_rocksdb
+import config
+from config import get_time, sh
+
+COLD_SECS = 60
+COLD_RUNS = 3
+STEADY_FRACTION = 0.95
+# how often the process tree is looked at for the open, and db_bench's
+# report for new seconds
+POLL_SECS = 0.005
+
+ANN_DATASETS = ["sift-128-euclidean.hdf5"]
+ANN_RUNNERS = ["faiss", "annoy", "usearch"]
+# tokens per llama-bench repetition, each repetition one result
+LLAMA_TOKENS = 16
+LLAMA_REPS = 20
+ROCKSDB_BENCH = "readrandom"
+
+# (tag, numactl prefix, replicated)
+PLACEMENTS = [
+    ("default", "", False),
+    ("interleaved", "numactl --interleave=all", False),
+]
+PLACEMENTS_REPL = [("patched-repl", "", True)]
+
+FIELDS = [
+    "workload",
+    "tag",
+    "run_id",
+    "open_s",
+    "first_result_s",
+    "steady_s",
+    "steady_rate",
+    "rate_unit",
+    "start_time",
+    "end_time",
+]
+
+PR_SET_PDEATHSIG = 1
+
+
+def _preexec():
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL) != 0:
+        raise OSError(ctypes.get_errno(), "SET_PDEATHSIG")
+
+
+def _tree(pid: int) -> list[int]:
+    """pid and every process below it."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # gone since listdir
+        children.setdefault(ppid, []).append(int(entry))
+    tree = [pid]
+    for parent in tree:
+        tree.extend(children.get(parent, []))
+    return tree
+
+
+def _opened(pid: int, match) -> bool:
+    """Whether a process of the tree maps or holds open a path match takes."""
+    for member in _tree(pid):
+        try:
+            with open(f"/proc/{member}/maps") as f:
+                for line in f:
+                    fields = line.split(maxsplit=5)
+                    if len(fields) == 6 and match(fields[5].rstrip("\n")):
+                        return True
+            for fd in os.listdir(f"/proc/{member}/fd"):
+                if match(os.readlink(f"/proc/{member}/fd/{fd}")):
+                    return True
+        except OSError:
+            continue  # exited, or not ours to read
+    return False
+
+
+class Launch:
+    """A workload's process, its output lines stamped as they arrive.
+
+    With match, a thread polls the process tree until a path match takes
+    shows up in it, and stamps that as the open.
+    """
+
+    def __init__(self, cmd: str, cwd: str | None = None, match=None):
+        print(f"$ {cmd}")
+        self.start_ns = time.monotonic_ns()
+        self.proc = subprocess.Popen(
+            cmd,
+            shell=True,
+            executable="/bin/bash",
+            cwd=cwd or config.ROOT_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+            preexec_fn=_preexec,
+        )
+        self.open_ns = None
+        self._watcher = None
+        if match is not None:
+            self._watcher = threading.Thread(target=self._watch, args=(match,))
+            self._watcher.start()
+
+    def _watch(self, match):
+        while self.proc.poll() is None:
+            if _opened(self.proc.pid, match):
+                self.open_ns = time.monotonic_ns()
+                return
+            time.sleep(POLL_SECS)
+
+    def lines(self):
+        """(monotonic ns, line) of the output, echoed, until it exits."""
+        for line in self.proc.stdout:
+            stamp = time.monotonic_ns()
+            print(line, end="")
+            yield stamp, line
+
+    def wait(self):
+        if self.proc.wait() != 0:
+            raise subprocess.CalledProcessError(
+                self.proc.returncode, self.proc.args
+            )
+        if self._watcher is not None:
+            self._watcher.join()
+
+
+def _ramp(intervals) -> tuple[int | None, float | None]:
+    """(end ns of the first interval at STEADY_FRACTION of the steady rate,
+    that rate) over (end ns, ops, duration ns) intervals.
+
+    (None, None), the ramp unmeasured, without a single interval.
+    """
+    if not intervals:
+        return None, None
+    rates = [ops / (duration / 1e9) for _, ops, duration in intervals]
+    steady = sum(rates[len(rates) // 2 :]) / len(rates[len(rates) // 2 :])
+    for (end, _, _), rate in zip(intervals, rates):
+        if rate >= STEADY_FRACTION * steady:
+            return end, steady
+    return intervals[-1][0], steady
+
+
+def ann_cold(runner: str, dataset: str, tag: str, numactl: str, repl: bool):
+    cmd = (
+        f"{numactl} uv run run_ann.py --{runner} --bench --cold-start"
+        f" --datasets {dataset} --running-time {COLD_SECS} --tag {tag}"
+    )
+    launch = Launch(bench_llama.run_repl(cmd) if repl else cmd)
+    fields = None
+    for _, line in launch.lines():
+        if line.startswith("COLD "):
+            fields = dict(kv.split("=", 1) for kv in line.split()[1:])
+    launch.wait()
+    if fields is None:
+        raise RuntimeError(f"{runner}: no COLD line in run_ann output")
+
+    first = int(fields["first_ns"])
+    ops = [int(count) for count in fields["ops"].split(",") if count]
+    intervals = [
+        (first + (i + 1) * 10**9, count, 10**9) for i, count in enumerate(ops)
+    ]
+    return {
+        "workload": f"ann-{fields['runner']}-{os.path.splitext(dataset)[0]}",
+        "start_ns": launch.start_ns,
+        "open_ns": int(fields["open_ns"]),
+        "first_ns": first,
+        "intervals": intervals,
+        "rate_unit": "queries/s",
+    }
+
+
+def llama_cold(tag: str, numactl: str, repl: bool):
+    cmd = (
+        f"{numactl} {bench_llama.BIN} -m {bench_llama.MODEL} -t $(nproc --all)"
+        f" --mmap 1 -p 0 -n {LLAMA_TOKENS} -r {LLAMA_REPS} -o jsonl"
+    )
+    model = os.path.basename(bench_llama.MODEL)
+    launch = Launch(
+        bench_llama.run_repl(cmd) if repl else cmd,
+        match=lambda path: os.path.basename(path) == model,
+    )
+    result = None
+    for stamp, line in launch.lines():
+        if line.startswith("{"):
+            result = (stamp, json.loads(line))
+    launch.wait()
+    if result is None:
+        raise RuntimeError("llama-bench printed no result")
+
+    # the line comes after the last repetition: each one ended the length of
+    # the ones after it before that
+    stamp, test = result
+    samples = test["samples_ns"]
+    intervals = []
+    end = stamp
+    for duration in reversed(samples):
+        intervals.append((end, test["n_gen"], duration))
+        end -= duration
+    intervals.reverse()
+    return {
+        "workload": "llama",
+        "start_ns": launch.start_ns,
+        "open_ns": launch.open_ns,
+        "first_ns": intervals[0][0],
+        "intervals": intervals,
+        "rate_unit": "tokens/s",
+    }
+
+
+def rocksdb_cold(tag: str, numactl: str, repl: bool):
+    output_dir = os.path.join(
+        bench_rocksdb.RESULT_DIR, "outputs", f"cold-{tag}"
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(output_dir, "*")):
+        os.remove(path)
+
+    cmd = bench_rocksdb.bench_cmd(
+        ROCKSDB_BENCH,
+        f"{bench_rocksdb.bench_env(COLD_SECS)} REPORT_INTERVAL_SECONDS=1",
+        f"OUTPUT_DIR={output_dir}",
+        numactl,
+    )
+    launch = Launch(
+        bench_llama.run_repl(cmd) if repl else cmd,
+        cwd=bench_rocksdb.BUILD_DIR,
+        match=lambda path: path.startswith(bench_rocksdb.DB_DIR)
+        and path.endswith(".sst"),
+    )
+
+    # db_bench writes a line a second, each stamped when it is seen
+    intervals = []
+
+    def tail():
+        pattern = os.path.join(
+            output_dir, f"benchmark_{ROCKSDB_BENCH}.t*.log.r.csv"
+        )
+        seen = 0
+        while True:
+            running = launch.proc.poll() is None
+            paths = glob.glob(pattern)
+            if paths:
+                with open(paths[0]) as f:
+                    rows = f.read().split("\n")[:-1]  # complete lines only
+                stamp = time.monotonic_ns()
+                for row in list(csv.DictReader(rows))[seen:]:
+                    intervals.append((stamp, int(row["interval_qps"]), 10**9))
+                    seen += 1
+            if not running:
+                return
+            time.sleep(POLL_SECS)
+
+    tailer = threading.Thread(target=tail)
+    tailer.start()
+    for _ in launch.lines():
+        pass
+    launch.wait()
+    tailer.join()
+    if not intervals:
+        raise RuntimeError(f"db_bench {ROCKSDB_BENCH} reported nothing")
+
+    first = next((end for end, ops, _ in intervals if ops), intervals[-1][0])
+    return {
+        "workload": f"rocksdb-{ROCKSDB_BENCH}",
+        "start_ns": launch.start_ns,
+        "open_ns": launch.open_ns,
+        "first_ns": first,
+        "intervals": intervals,
+        "rate_unit": "ops/s",
+    }
+
+
+def save(tag: str, rows):
+    os.makedirs(config.RESULT_DIR_COLD_START, exist_ok=True)
+    path = os.path.join(config.RESULT_DIR_COLD_START, f"{tag}.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[OK] {len(rows)} cold starts -> {path}")
+
+
+def row(result, tag: str, run_id: int, start_time: str, end_time: str):
+    def since_start(ns):
+        return "" if ns is None else (ns - result["start_ns"]) / 1e9
+
+    steady_ns, steady_rate = _ramp(result["intervals"])
+    return {
+        "workload": result["workload"],
+        "tag": tag,
+        "run_id": run_id,
+        "open_s": since_start(result["open_ns"]),
+        "first_result_s": since_start(result["first_ns"]),
+        "steady_s": since_start(steady_ns),
+        "steady_rate": "" if steady_rate is None else steady_rate,
+        "rate_unit": result["rate_unit"],
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+
+
+def prepare():
+    """Whatever would otherwise be built inside a timed start: the ann
+    indices, and the DB."""
+    sh(
+        f"uv run run_ann.py {' '.join(f'--{r}' for r in ANN_RUNNERS)}"
+        f" --datasets {' '.join(ANN_DATASETS)}"
+    )
+    bench_rocksdb.prepare_dirs()
+    bench_rocksdb.load_db("cold-start")
+
+
+def run_placement(tag: str, numactl: str, repl: bool):
+    workloads = [
+        *(
+            (lambda r=runner, d=dataset: ann_cold(r, d, tag, numactl, repl))
+            for dataset in ANN_DATASETS
+            for runner in ANN_RUNNERS
+        ),
+        lambda: llama_cold(tag, numactl, repl),
+        lambda: rocksdb_cold(tag, numactl, repl),
+    ]
+
+    rows = []
+    for run_id in range(1, COLD_RUNS + 1):
+        for workload in workloads:
+            sh("sync; echo 3 > /proc/sys/vm/drop_caches")
+            start_time = get_time()
+            result = workload()
+            rows.append(row(result, tag, run_id, start_time, get_time()))
+            save(tag, rows)
+
+
+def run_cold_start():
+    prepare()
+    sh("echo 0 > /proc/sys/kernel/numa_balancing")
+    for tag, numactl, repl in PLACEMENTS:
+        run_placement(tag, numactl, repl)
+
+
+def run_cold_start_repl():
+    prepare()
+    sh("echo 0 > /sys/kernel/debug/repl_pt/main_placement")
+    sh("echo 1 > /sys/kernel/debug/repl_pt/clear_registered")
+    for suffix in [
+        *bench_ann.INDEX_SUFFIXES,
+        os.path.basename(bench_llama.MODEL),
+        ".sst",
+    ]:
+        sh(f"echo {suffix} > /sys/kernel/debug/repl_pt/registered")
+    for tag, numactl, repl in PLACEMENTS_REPL:
+        run_placement(tag, numactl, repl)
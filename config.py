@@ -61,6 +61,9 @@ TMP_DIR_ROCKSDB = os.path.join(TMP_DIR, "rocksdb")
 # the ann bench's inputs: both are gitignored, so they are per machine
 ANN_DATA_DIR = os.path.join(ROOT_DIR, "ann", "data")
 ANN_INDEX_DIR = os.path.join(ROOT_DIR, "ann", "indices")
+# a shared directory the datasets are looked up in before any download,
+# lab machines with no (or a slow) network point it at an NFS copy
+ANN_MIRROR_DIR = os.environ.get("ANN_MIRROR_DIR")
 
 RESULT_DIR = os.path.join(ROOT_DIR, "results")
 RESULT_DIR_ANN = os.path.join(RESULT_DIR, PLATFORM, "ann")
@@ -70,6 +73,7 @@ RESULT_DIR_MICROBENCH = os.path.join(RESULT_DIR, PLATFORM, "microbench")
 RESULT_DIR_LLAMA = os.path.join(RESULT_DIR, PLATFORM, "llama")
 RESULT_DIR_PRESSURE = os.path.join(RESULT_DIR, PLATFORM, "pressure")
 RESULT_DIR_SHARING = os.path.join(RESULT_DIR, PLATFORM, "sharing")
+RESULT_DIR_COLD_START = os.path.join(RESULT_DIR, PLATFORM, "cold-start")
 
 PLOT_DIR = os.path.join(ROOT_DIR, "plots")
 PLOT_DIR_ANN = os.path.join(PLOT_DIR, "ann")
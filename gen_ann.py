@@ -0,0 +1,55 @@
+import ann.arrays
+import ann.synth
+import config
+import argparse
+import os
+
+DATA_DIR = config.ANN_DATA_DIR
+
+parser = argparse.ArgumentParser(
+    description="Generate a clustered dataset with exact ground truth"
+)
+size = parser.add_mutually_exclusive_group(required=True)
+size.add_argument("--count", type=int, help="Number of train vectors")
+size.add_argument("--gb", type=float, help="Size of train, in GiB")
+parser.add_argument("--dims", type=int, default=128, help="Dimensions")
+parser.add_argument(
+    "--metric", choices=["euclidean", "angular"], default="euclidean"
+)
+parser.add_argument(
+    "--clusters",
+    type=int,
+    default=ann.synth.SYNTH_CLUSTERS,
+    help="Number of clusters the vectors are drawn around",
+)
+parser.add_argument("--seed", type=int, default=0, help="Random seed")
+parser.add_argument(
+    "--format",
+    choices=["raw", "hdf5"],
+    default="raw",
+    help="raw: the .npy directory run_ann.py maps, hdf5: also an"
+    " ann-benchmarks file next to it",
+)
+parser.add_argument(
+    "--threads", type=int, default=config.NUM_THREADS, help="Number of threads"
+)
+args = parser.parse_args()
+
+if args.gb is not None:
+    spec = ann.synth.for_gb(args.gb, args.dims, args.metric, args.seed)
+    spec = ann.synth.Spec(
+        spec.dims, spec.metric, spec.count, args.clusters, args.seed
+    )
+else:
+    spec = ann.synth.Spec(
+        args.dims, args.metric, args.count, args.clusters, args.seed
+    )
+
+dataset_base, _ = os.path.splitext(spec.name)
+out_dir = ann.arrays.array_dir(DATA_DIR, dataset_base)
+ann.synth.generate(spec, out_dir, args.threads)
+if args.format == "hdf5":
+    ann.synth.write_hdf5(out_dir, os.path.join(DATA_DIR, spec.name))
+
+# what to hand run_ann.py --datasets
+print(spec.name)
@@ -5,6 +5,7 @@ import bench_fio
 import bench_llama
 import bench_micro
 import bench_sharing
+import cold_start
 import monitoring
 import pressure
 
@@ -14,8 +15,14 @@ parser.add_argument(
     choices=[
         "ann",
         "ann-repl",
+        "ann-size",
+        "ann-advice",
+        "ann-dtype",
+        "ann-dtype-repl",
         "pressure",
         "pressure-repl",
+        "cold-start",
+        "cold-start-repl",
         "rocksdb",
         "rocksdb-repl",
         "fio",
@@ -66,6 +73,14 @@ if args.run == "ann":
     bench_and_monitor(bench_ann.run_bench_ann, "ann")
 elif args.run == "ann-repl":
     bench_and_monitor(bench_ann.run_bench_ann_repl, "ann-repl")
+elif args.run == "ann-size":
+    bench_and_monitor(bench_ann.run_bench_ann_size, "ann-size")
+elif args.run == "ann-advice":
+    bench_and_monitor(bench_ann.run_bench_ann_advice, "ann-advice")
+elif args.run == "ann-dtype":
+    bench_and_monitor(bench_ann.run_bench_ann_dtype, "ann-dtype")
+elif args.run == "ann-dtype-repl":
+    bench_and_monitor(bench_ann.run_bench_ann_dtype_repl, "ann-dtype-repl")
 elif args.run == "pressure":
     # 0.5s to catch the reclaim transient at each memory.high step
     bench_and_monitor(
@@ -77,6 +92,10 @@ elif args.run == "pressure-repl":
         "ann-pressure-repl",
         pressure.SAMPLE_INTERVAL,
     )
+elif args.run == "cold-start":
+    bench_and_monitor(cold_start.run_cold_start, "cold-start")
+elif args.run == "cold-start-repl":
+    bench_and_monitor(cold_start.run_cold_start_repl, "cold-start-repl")
 elif args.run == "rocksdb":
     bench_and_monitor(bench_rocksdb.run_bench_rocksdb, "rocksdb")
 elif args.run == "rocksdb-repl":
@@ -1,4 +1,10 @@
+import ann.advise
+import ann.cache
+import ann.fetch
 import ann.lib
+import ann.mod_annoy
+import ann.mod_faiss
+import ann.mod_usearch
 import config
 import argparse
 
@@ -32,25 +38,209 @@ parser.add_argument("--bench", action="store_true", help="Bench the ann search")
 parser.add_argument(
     "--faiss", action="store_true", help="Evaluate faiss benchmark"
 )
+parser.add_argument(
+    "--faiss-families",
+    nargs="+",
+    choices=ann.mod_faiss.FAMILIES,
+    default=["ivfflat"],
+    help="faiss index families --faiss evaluates",
+)
 parser.add_argument(
     "--annoy", action="store_true", help="Evaluate annoy benchmark"
 )
 parser.add_argument(
     "--usearch", action="store_true", help="Evaluate usearch benchmark"
 )
+parser.add_argument(
+    "--usearch-dtypes",
+    nargs="+",
+    choices=ann.mod_usearch.DTYPES,
+    default=[ann.mod_usearch.DTYPE],
+    help="Vector dtypes --usearch evaluates, an index file each",
+)
+parser.add_argument(
+    "--exact",
+    action="store_true",
+    help="Evaluate exact brute force search, the recall and bandwidth bound",
+)
+parser.add_argument(
+    "--latency",
+    action="store_true",
+    help="Time every query on its own, report latency percentiles",
+)
+parser.add_argument(
+    "--annoy-executor",
+    choices=ann.mod_annoy.EXECUTORS,
+    default="thread",
+    help="Run annoy queries on a thread pool, or on processes sharing the index",
+)
+parser.add_argument(
+    "--advice",
+    choices=ann.advise.HINTS,
+    default="none",
+    help="madvise (or fadvise) hint applied to the mapped index before the"
+    " first query, recorded with the results; none with --replica, whose"
+    " copies are not the mapped index",
+)
+parser.add_argument(
+    "--shard",
+    action="store_true",
+    help="Split the queries per NUMA node, on threads pinned to that node",
+)
+parser.add_argument(
+    "--replica",
+    action="store_true",
+    help="Load a private copy of the index per NUMA node, each node's"
+    " threads querying their own copy",
+)
+parser.add_argument(
+    "--batch-size",
+    type=int,
+    nargs="+",
+    help="Submit the queries in batches of these sizes (default: one batch)",
+)
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    nargs="+",
+    help="Batches in flight at once, each combination with --batch-size"
+    " is run (default: 1)",
+)
+parser.add_argument(
+    "--serve",
+    type=int,
+    nargs="+",
+    help="Serve the index from this many worker processes, sharing its"
+    " mapping (one run per count)",
+)
+parser.add_argument(
+    "--serve-pin",
+    action="store_true",
+    help="Pin the --serve workers round robin to the NUMA nodes",
+)
+parser.add_argument(
+    "--server-concurrency",
+    type=int,
+    nargs="+",
+    help="Serve the index over a Unix socket, replay the queries from this"
+    " many client connections (one run per count), report end to end latency",
+)
+parser.add_argument(
+    "--write-rate",
+    type=float,
+    nargs="+",
+    help="Insert new vectors at each of these rates per second while"
+    " querying, report QPS and recall drift (runners that can insert)",
+)
+parser.add_argument(
+    "--cold-start",
+    action="store_true",
+    help="Time the index open, the first query and the ramp to full QPS,"
+    " for cold_start.py (the caller drops the caches)",
+)
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    nargs="+",
+    help="Replay a Zipfian stream over the queries through an LRU result"
+    " cache of each of these sizes (0: none), report hit ratio and backend QPS",
+)
+parser.add_argument(
+    "--zipf",
+    type=float,
+    default=ann.cache.ZIPF_S,
+    help="Exponent of the --cache-size stream's query popularity",
+)
+parser.add_argument(
+    "--tenants",
+    action="store_true",
+    help="Run every dataset at once, one process each, report QPS per"
+    " tenant and what they hold on every node",
+)
+parser.add_argument(
+    "--tenant-threads",
+    type=int,
+    nargs="+",
+    help="Threads of each --tenants dataset, in --datasets order (default:"
+    " --threads split evenly)",
+)
+parser.add_argument(
+    "--target-qps",
+    type=float,
+    nargs="+",
+    help="Open loop: offer each of these loads in turn, report response times",
+)
+parser.add_argument(
+    "--sweep",
+    action="store_true",
+    help="Sweep each runner's search setting, report the recall/QPS frontier",
+)
+parser.add_argument(
+    "--scaling",
+    action="store_true",
+    help="Run each runner at 1, 2, 4, ... up to --threads threads",
+)
+parser.add_argument(
+    "--target-recall",
+    type=float,
+    default=0.9,
+    help="Recall the sweep picks the fastest setting for",
+)
+parser.add_argument(
+    "--mirror-dir",
+    default=config.ANN_MIRROR_DIR,
+    help="Content addressed dataset mirror, tried before downloading",
+)
+parser.add_argument(
+    "--dataset-url",
+    default=ann.fetch.DATASET_URL,
+    help="Where the datasets are downloaded from",
+)
+parser.add_argument(
+    "--require-pin",
+    action="store_true",
+    help="Refuse a downloaded dataset with no pinned or recorded sha256,"
+    " instead of keeping it with a warning",
+)
 args = parser.parse_args()
 
 ann.lib.run(
-    DATA_DIR,
-    INDEX_DIR,
-    RESULT_DIR,
-    args.datasets,
-    args.faiss,
-    args.annoy,
-    args.usearch,
-    args.bench,
-    args.recreate_index,
-    args.tag,
-    args.threads,
-    args.running_time,
+    data_dir=DATA_DIR,
+    index_dir=INDEX_DIR,
+    result_dir=RESULT_DIR,
+    datasets=args.datasets,
+    faiss=args.faiss,
+    annoy=args.annoy,
+    usearch=args.usearch,
+    bench=args.bench,
+    recreate_index=args.recreate_index,
+    tag=args.tag,
+    threads=args.threads,
+    running_time=args.running_time,
+    latency=args.latency,
+    annoy_executor=args.annoy_executor,
+    shard=args.shard,
+    target_qps=args.target_qps,
+    sweep=args.sweep,
+    target_recall=args.target_recall,
+    mirror_dir=args.mirror_dir,
+    dataset_url=args.dataset_url,
+    exact=args.exact,
+    faiss_families=args.faiss_families,
+    scaling=args.scaling,
+    replica=args.replica,
+    batch_sizes=args.batch_size,
+    concurrencies=args.concurrency,
+    serve=args.serve,
+    serve_pin=args.serve_pin,
+    server_concurrencies=args.server_concurrency,
+    write_rates=args.write_rate,
+    advice=args.advice,
+    cold_start=args.cold_start,
+    cache_sizes=args.cache_size,
+    zipf=args.zipf,
+    tenants=args.tenants,
+    tenant_threads=args.tenant_threads,
+    usearch_dtypes=args.usearch_dtypes,
+    require_pin=args.require_pin,
 )
@@ -0,0 +1,148 @@
+import functools
+import hashlib
+import http.server
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from ann import fetch
+
+DATASET = "tiny-16-euclidean.hdf5"
+
+
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with the one Range form fetch sends."""
+
+    def send_head(self):
+        spec = self.headers.get("Range")
+        if spec is None:
+            return super().send_head()
+        path = self.translate_path(self.path)
+        size = os.path.getsize(path)
+        start = int(spec.removeprefix("bytes=").rstrip("-"))
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return None
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.end_headers()
+        return f
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.served = os.path.join(root, "served")
+        self.data_dir = os.path.join(root, "data")
+        self.mirror_dir = os.path.join(root, "mirror")
+        os.makedirs(self.served)
+        os.makedirs(self.data_dir)
+
+        self.content = os.urandom(3 * 2**20 + 12345)
+        self.digest = hashlib.sha256(self.content).hexdigest()
+        with open(os.path.join(self.served, DATASET), "wb") as f:
+            f.write(self.content)
+
+        handler = functools.partial(RangeHandler, directory=self.served)
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fetch(self, **kwargs):
+        return fetch.fetch_dataset(
+            DATASET, self.data_dir, base_url=self.url, **kwargs
+        )
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_resumes_a_truncated_part(self):
+        part = os.path.join(self.data_dir, f"{DATASET}.part")
+        with open(part, "wb") as f:
+            f.write(self.content[: 2**20])
+
+        with mock.patch.dict(fetch.CHECKSUMS, {DATASET: self.digest}):
+            with mock.patch.object(
+                fetch.requests, "get", wraps=fetch.requests.get
+            ) as get:
+                path = self.fetch()
+
+        self.assertEqual(
+            get.call_args.kwargs["headers"], {"Range": "bytes=1048576-"}
+        )
+        self.assertEqual(self.read(path), self.content)
+        self.assertFalse(os.path.exists(part))
+
+    def test_rejects_a_checksum_mismatch(self):
+        with mock.patch.dict(fetch.CHECKSUMS, {DATASET: "0" * 64}):
+            with self.assertRaises(IOError):
+                self.fetch()
+        self.assertEqual(os.listdir(self.data_dir), [])
+
+    def test_resumes_a_truncated_dataset_left_in_place(self):
+        path = os.path.join(self.data_dir, DATASET)
+        with open(path, "wb") as f:
+            f.write(self.content[: 2**20])
+
+        with mock.patch.dict(fetch.CHECKSUMS, {DATASET: self.digest}):
+            with mock.patch.object(
+                fetch.requests, "get", wraps=fetch.requests.get
+            ) as get:
+                self.fetch()
+
+        self.assertEqual(
+            get.call_args.kwargs["headers"], {"Range": "bytes=1048576-"}
+        )
+        self.assertEqual(self.read(path), self.content)
+
+    def test_keeps_an_unpinned_download_and_its_digest(self):
+        path = self.fetch()
+        self.assertEqual(self.read(path), self.content)
+
+        # the recorded digest verifies it from then on, without the server
+        self.server.shutdown()
+        self.assertEqual(self.fetch(), path)
+
+    def test_keeps_an_unpinned_download_as_part(self):
+        with self.assertRaisesRegex(IOError, self.digest):
+            self.fetch(require_pin=True)
+        part = os.path.join(self.data_dir, f"{DATASET}.part")
+        self.assertEqual(self.read(part), self.content)
+
+        # pinned afterwards, the complete part is verified, not downloaded
+        with mock.patch.dict(fetch.CHECKSUMS, {DATASET: self.digest}):
+            path = self.fetch()
+        self.assertEqual(self.read(path), self.content)
+
+    def test_publishes_to_and_serves_from_the_mirror(self):
+        with mock.patch.dict(fetch.CHECKSUMS, {DATASET: self.digest}):
+            self.fetch(mirror_dir=self.mirror_dir)
+        os.remove(os.path.join(self.data_dir, DATASET))
+        self.server.shutdown()
+
+        path = self.fetch(mirror_dir=self.mirror_dir)
+        self.assertEqual(
+            path, os.path.join(self.mirror_dir, "sha256", self.digest)
+        )
+        self.assertEqual(self.read(path), self.content)
+
+
+if __name__ == "__main__":
+    unittest.main()